@@ -1,9 +1,13 @@
 import pandas as pd
 import re
 import numpy as np
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from dataset_io import read_table, write_table, with_format
 
 # 1. Load your file
-df = pd.read_csv('my_updated.csv')
+df = read_table(with_format('my_updated.csv'))
 
 # Helper function to clean strings and find averages
 def calculate_avg_from_list(num_list):
@@ -35,7 +39,7 @@ def process_area(row):
 df['Cleaned_Area'] = df.apply(process_area, axis=1)
 
 # 3. Save the updated file
-df.to_csv('my_updated.csv', index=False)
+write_table(df, with_format('my_updated.csv'))
 
 print("Extraction complete. Saved to 'my_updated.csv'")
 print(df[['area', 'Cleaned_Area']].head())
@@ -1,8 +1,12 @@
 import pandas as pd
 import numpy as np
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from dataset_io import read_table, write_table, with_format
 
 # 1. Load your file (the one updated from the previous steps)
-df = pd.read_csv('my_updated.csv')
+df = read_table(with_format('my_updated.csv'))
 
 # 2. Ensure the columns are treated as numbers (just to be safe)
 df['Exact_Price'] = pd.to_numeric(df['Exact_Price'], errors='coerce')
@@ -20,7 +24,7 @@ df['Price_Per_Sqft'] = df['Price_Per_Sqft'].replace([np.inf, -np.inf], np.nan)
 df['Price_Per_Sqft'] = df['Price_Per_Sqft'].round(0)
 
 # 5. Save the final file
-df.to_csv('my_final_listings.csv', index=False)
+write_table(df, with_format('my_final_listings.csv'))
 
 print("Calculation complete. Saved to 'my_final_listings.csv'")
 print(df[['Exact_Price', 'Cleaned_Area', 'Price_Per_Sqft']].head())
@@ -1,9 +1,13 @@
 import pandas as pd
 import re
 import urllib.parse
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from dataset_io import read_table, write_table, with_format
 
 # 1. Load your file
-df = pd.read_csv('my_listings_final_complete.csv')
+df = read_table(with_format('my_listings_final_complete.csv'))
 
 # ==========================================
 # EXPANDED MASTER DATA
@@ -147,7 +151,7 @@ df[['Extracted_Locality', 'Zone']] = df.apply(process_row, axis=1)
 # ==========================================
 # SAVE
 # ==========================================
-df.to_csv('my_listings_zoned_v3.csv', index=False)
+write_table(df, with_format('my_listings_zoned_v3.csv'))
 
 print("Extraction complete.")
 print(f"Rows filled: {df['Extracted_Locality'].notna().sum()} out of {len(df)}")
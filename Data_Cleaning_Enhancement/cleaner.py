@@ -1,8 +1,11 @@
-import pandas as pd
 import re
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from dataset_io import read_table, write_table, with_format
 
 # 1. Load your file
-df = pd.read_csv('../dataset/listings_final.csv')
+df = read_table(with_format('../dataset/listings_final.csv'))
 
 def calculate_exact_price(price_str):
     # Return None if empty or "Price on Request"
@@ -63,6 +66,6 @@ df['Exact_Price'] = df['price'].apply(calculate_exact_price)
 
 # 3. Save to CSV
 # formatting float_format to ensure no scientific notation is written
-df.to_csv('my_updated_exact.csv', index=False, float_format='%.0f')
+write_table(df, with_format('my_updated_exact.csv'), float_format='%.0f')
 
 print("Processed successfully.")
@@ -1,9 +1,13 @@
 import pandas as pd
 import re
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from dataset_io import read_table, write_table, with_format
 
 # 1. Load your file (Use the latest file you saved)
-input_file = 'my_updated_exact.csv'
-df = pd.read_csv(input_file)
+input_file = with_format('my_updated_exact.csv')
+df = read_table(input_file)
 
 # Function to extract average Area (Sqft) from the description
 def extract_area_sqft(description):
@@ -61,7 +65,7 @@ print("Calculating Price Per Sqft...")
 df['Price_Per_Sqft'] = df.apply(calc_price_per_sqft, axis=1)
 
 # 3. Save
-df.to_csv('my_final_data.csv', index=False, float_format='%.0f')
+write_table(df, with_format('my_final_data.csv'), float_format='%.0f')
 
 print("Done! Data saved to 'my_final_data.csv'")
 print(df[['price', 'Exact_Price', 'Extracted_Area_Avg', 'Price_Per_Sqft']].head())
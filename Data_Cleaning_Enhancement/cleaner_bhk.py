@@ -1,9 +1,12 @@
-import pandas as pd
 import re
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from dataset_io import read_table, write_table, with_format
 
 # 1. Load your CSV file
 # Replace 'my.csv' with the actual name of your file if different
-df = pd.read_csv('my_updated_exact.csv')
+df = read_table(with_format('my_updated_exact.csv'))
 
 # Function to extract numbers only if the row is about an Apartment/Villa
 def extract_bhk_counts(text):
@@ -30,7 +33,7 @@ column_name = 'property_type'
 df['BHK_List'] = df[column_name].apply(extract_bhk_counts)
 
 # 3. Save the updated file
-df.to_csv('my_updated.csv', index=False)
+write_table(df, with_format('my_updated.csv'))
 
 print("Extraction complete. Data saved to 'my_updated.csv'")
 print(df[[column_name, 'BHK_List']].head())
@@ -7,8 +7,14 @@ import pandas as pd
 import numpy as np
 from collections import Counter
 
-fname = "99_magic_final.csv"
-OUTPUT_FILE = "listings_scored_final1.csv"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from keyword_matrix import KeywordMatrix, text_fingerprint
+from dataset_io import read_table, write_table
+
+# .csv, .parquet or .arrow (BHK_List stays a list<int> column outside CSV)
+fname = os.getenv("SCORING_INPUT", "99_magic_final.csv")
+OUTPUT_FILE = os.getenv("SCORING_OUTPUT", "listings_scored_final1.csv")
+KEYWORD_HITS_FILE = "listings_keyword_hits"  # .npz + .vocab.json, reused when only weights change
 
 # Scoring constants
 ZONE_LIVABILITY = {"East": 7.5, "South": 9.2, "North": 8.0, "West": 6.8, "Central": 9.5, "Unknown": 5.0}
@@ -76,25 +82,38 @@ def robust_normalize(series, invert=False):
     return norm
 
 def parse_bhk_list(cell):
-    if pd.isna(cell): return []
     if isinstance(cell, list): return cell
+    if pd.isna(cell): return []
     s = str(cell)
     # Extract all digits
     nums = re.findall(r'\d+', s)
     return [int(x) for x in nums]
 
-def compute_keyword_boost(text):
-    if pd.isna(text): return 0.0
-    t = str(text).lower()
-    score = sum([wt for kw, wt in KEYWORD_WEIGHTS.items() if kw in t])
-    return min(10.0, score)
+def load_keyword_hits(ids, texts):
+    """
+    The listing x keyword hit matrix for these texts: loaded from
+    KEYWORD_HITS_FILE when it was saved from the same listings, otherwise
+    rescanned and saved. Retuning KEYWORD_WEIGHTS then skips the text scan.
+    """
+    source = text_fingerprint(texts)
+    if os.path.exists(KEYWORD_HITS_FILE + ".npz") and os.path.exists(KEYWORD_HITS_FILE + ".vocab.json"):
+        try:
+            saved = KeywordMatrix.load(KEYWORD_HITS_FILE)
+            if saved.covers(ids, source, KEYWORD_WEIGHTS, "substring"):
+                print(f"Reusing keyword hits from {KEYWORD_HITS_FILE}.npz")
+                return saved
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not read {KEYWORD_HITS_FILE}: {e}")
+    hits = KeywordMatrix.build(ids, texts, KEYWORD_WEIGHTS, mode="substring")
+    hits.save(KEYWORD_HITS_FILE)
+    return hits
 
 # ---------- Main Execution ----------
 
 def main():
     input_file = find_input_file()
     print(f"Processing: {input_file}")
-    df = pd.read_csv(input_file)
+    df = read_table(input_file)
 
     # Map columns
     col_area = safe_get_col(df, ["Cleaned_Area", "Area", "sqft"])
@@ -160,8 +179,11 @@ def main():
         df["Score_Zone_Inv"] = 5.0
 
     # Keyword Boost
+    # Hits are scanned once into a sparse listing x keyword matrix; the boost is
+    # min(10, H @ w), the sum of the weights of the keywords found in the text
     combo_text = df[col_title].fillna('') + " " + df[col_desc].fillna('')
-    df["Score_Keywords"] = combo_text.apply(compute_keyword_boost)
+    hits = load_keyword_hits([str(i) for i in df.index], combo_text.tolist())
+    df["Score_Keywords"] = np.minimum(10.0, hits.boosts(KEYWORD_WEIGHTS))
 
     # Locality Strength (Frequency check)
     if col_loc:
@@ -206,7 +228,7 @@ def main():
     df["Recommendation_Score"] = ((df["Livability_Score"] + df["Investment_Score"]) / 2).round(1)
 
     # --- 4. SAVE ---
-    df.to_csv(OUTPUT_FILE, index=False)
+    write_table(df, OUTPUT_FILE)
     print(f"\nSuccess! Data saved to {OUTPUT_FILE}")
     
     # Verification print
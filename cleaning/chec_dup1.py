@@ -1,12 +1,15 @@
-import pandas as pd
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from dataset_io import read_table, write_table, with_format
 
 # ==== CONFIG ====
-INPUT_FILE = "listings_final.csv"
-OUTPUT_FILE = "listings_final1.csv"
+INPUT_FILE = with_format("listings_final.csv")
+OUTPUT_FILE = with_format("listings_final1.csv")
 # =================
 
 # Load CSV
-df = pd.read_csv(INPUT_FILE)
+df = read_table(INPUT_FILE)
 
 print("Original rows:", len(df))
 
@@ -20,7 +23,7 @@ print("After removing duplicates:", len(df_cleaned))
 print("Removed:", len(df) - len(df_cleaned))
 
 # Save new file
-df_cleaned.to_csv(OUTPUT_FILE, index=False, encoding="utf-8")
+write_table(df_cleaned, OUTPUT_FILE, encoding="utf-8")
 
 print("\n✅ DONE")
 print("New file saved as:", OUTPUT_FILE)
@@ -1,23 +1,45 @@
-import os
 import json
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+import time
+import asyncio
+import threading
+from functools import partial
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List
 import chromadb
 from collections import defaultdict, deque
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from sentence_transformers import SentenceTransformer
 
 # ---------------------------
 # Local modules
 # ---------------------------
-from config import CHROMA_DIR, EMBEDDING_MODEL, groq_client, GROQ_MODEL
-from filters_extractor import extract_filters_llm
-from ranking import compute_final_score
+from config import (
+    CHROMA_DIR, EMBEDDING_MODEL, GROQ_MODEL, SPECULATIVE_RETRIEVAL, CPU_WORKERS,
+    EMBED_CACHE_SIZE, EMBED_CACHE_PATH, SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_SIZE, INDEX_VERSION_CHECK_SECS, RETRIEVAL_BACKEND, RETRIEVAL_START_K,
+    RETRIEVAL_MAX_K, RETRIEVAL_MIN_SURVIVORS, RETRIEVAL_TIME_BUDGET_MS, PROXIMITY_RADIUS_KM,
+    METADATA_PREFILTER, BATCH_MAX_CONCURRENCY,
+    KEYWORD_MATRIX_PATH, async_groq_client,
+)
+from filters_extractor import extract_filters_llm_async, EXTRACTION_STATS
+from fallback_extractor import extract_all as fallback_extract
+from ranking import compute_final_scores_for
+from keyword_matrix import KeywordMatrix, keyword_boosts
 from locality_map import infer_zone_from_locality
-from rerank import rerank
+from rerank import rerank_async
 from personal import save_feedback, init_db
 from locality_coords import get_coords_for_locality
-from distance_utils import is_within_radius
+from locality_resolver import COORDS_FROM_MATCH
+from distance_utils import within_radius_mask, bounding_box
+from embedding_cache import EmbeddingCache
+from llm_cache import llm_cache
+from semantic_cache import SemanticCache
+from numpy_index import NumpyIndex
+from metadata_store import MetadataStore
+from spatial_index import SpatialIndex
 
 # ---------------------------
 # FastAPI Setup
@@ -29,9 +51,116 @@ print(f"Connecting to ChromaDB at {CHROMA_DIR}...")
 chroma_client = chromadb.PersistentClient(path=str(CHROMA_DIR))
 collection = chroma_client.get_collection(name="listings")
 
+def load_search_index(coll):
+    """
+    Object that answers .query(): the Chroma collection itself, or an exact
+    in-memory NumpyIndex built from it (RETRIEVAL_BACKEND=numpy).
+    """
+    if RETRIEVAL_BACKEND == "numpy":
+        return NumpyIndex.from_chroma(coll)
+    return coll
+
+search_index = load_search_index(collection)
+
+def load_metadata_store(coll):
+    """
+    Columnar listing metadata that turns where clauses into candidate ids
+    before a Chroma query (METADATA_PREFILTER). The NumpyIndex filters
+    through its own store, so it needs none.
+    """
+    if RETRIEVAL_BACKEND == "numpy" or not METADATA_PREFILTER:
+        return None
+    return MetadataStore.from_collection(coll)
+
+metadata_store = load_metadata_store(collection)
+# Listing coordinates (resolved at ingest) for radius filtering
+spatial_index = SpatialIndex.from_collection(collection)
+
+def load_keyword_boosts():
+    """
+    (row per listing id, n x 2 livability/investment boosts) from the keyword
+    hit matrix ingest.build_docs saves next to docs.jsonl. Listings missing
+    from it are scored from their text instead.
+    """
+    try:
+        matrix = KeywordMatrix.load(KEYWORD_MATRIX_PATH)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ No keyword hit matrix ({e}); keyword boosts will scan listing text")
+        return {}, np.zeros((0, 2))
+    print(f"🔑 Loaded keyword boosts for {len(matrix.ids)} listings")
+    return {doc_id: i for i, doc_id in enumerate(matrix.ids)}, keyword_boosts(matrix)
+
+keyword_rows, keyword_boost_matrix = load_keyword_boosts()
+
 print(f"Loading embedding model: {EMBEDDING_MODEL}...")
 embed_model = SentenceTransformer(EMBEDDING_MODEL, device='cpu')
 
+# Repeated queries (e.g. the UI quick actions) skip the CPU encode entirely
+query_embedding_cache = EmbeddingCache(max_size=EMBED_CACHE_SIZE, path=EMBED_CACHE_PATH, model_name=EMBEDDING_MODEL)
+query_embedding_cache.load()
+
+# Near-duplicate questions with identical filters reuse a previous answer
+semantic_cache = SemanticCache(SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE) if SEMANTIC_CACHE_ENABLED else None
+_index_version = {"value": None, "checked": 0.0}
+# Held by the one worker re-checking (and possibly reloading) the index
+_index_reload_lock = threading.Lock()
+
+def current_index_version():
+    """
+    Identifies the indexed corpus: collection id (changes when embed_index
+    recreates it) + the index_version stamp. Re-checked every
+    INDEX_VERSION_CHECK_SECS; also picks up the new collection handle
+    (and reloads the NumpyIndex / metadata store / spatial index / keyword
+    boosts when the corpus changed).
+
+    Only one worker re-checks at a time; requests arriving meanwhile keep
+    using the current index instead of starting reloads of their own.
+    """
+    global collection, search_index, metadata_store, spatial_index, keyword_rows, keyword_boost_matrix
+    if time.time() - _index_version["checked"] < INDEX_VERSION_CHECK_SECS:
+        return _index_version["value"]
+    if not _index_reload_lock.acquire(blocking=False):
+        return _index_version["value"]
+    try:
+        now = time.time()
+        if now - _index_version["checked"] < INDEX_VERSION_CHECK_SECS:
+            return _index_version["value"]  # another worker just finished a check
+        _index_version["checked"] = now  # claimed before the (slow) reload
+        latest = chroma_client.get_collection(name="listings")
+        meta = latest.metadata or {}
+        value = f"{latest.id}:{meta.get('index_version', '')}"
+        if _index_version["value"] is not None and value != _index_version["value"]:
+            search_index = load_search_index(latest)
+            metadata_store = load_metadata_store(latest)
+            spatial_index = SpatialIndex.from_collection(latest)
+            keyword_rows, keyword_boost_matrix = load_keyword_boosts()
+        elif RETRIEVAL_BACKEND != "numpy":
+            search_index = latest
+        _index_version["value"] = value
+        collection = latest
+    except Exception as e:
+        print("⚠️ Could not read index version:", e)
+    finally:
+        _index_reload_lock.release()
+    return _index_version["value"]
+
+# Bounded pool for blocking work (encode, Chroma, MySQL) so the event loop stays free.
+# Groq calls go through AsyncGroq and never occupy a worker.
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="cpu")
+
+async def run_blocking(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, partial(fn, *args, **kwargs))
+
+async def refresh_index_version():
+    """
+    current_index_version() for request handlers, called before every
+    retrieval; only hops to a worker when a re-check is due.
+    """
+    if time.time() - _index_version["checked"] < INDEX_VERSION_CHECK_SECS:
+        return _index_version["value"]
+    return await run_blocking(current_index_version)
+
 # ---------------------------
 # MEMORY STORE
 # ---------------------------
@@ -47,6 +176,16 @@ class QueryRequest(BaseModel):
     bhk: Optional[List[int]] = None
     zone: Optional[str] = None
     top_k: Optional[int] = 5
+    # Range filters (not extracted from the query text)
+    budget_min: Optional[float] = None
+    area_min: Optional[float] = None
+    area_max: Optional[float] = None
+    max_price_per_sqft: Optional[float] = None
+
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest]
+    include_summary: bool = True
+    max_concurrency: int = Field(8, ge=1, le=BATCH_MAX_CONCURRENCY)
 
 class FeedbackRequest(BaseModel):
     user_id: str
@@ -69,13 +208,26 @@ def get_formatted_history(user_id):
 # ---------------------------
 # Helper: Chroma Filter Builder
 # ---------------------------
-def build_chroma_filters(query_text, budget_max=None, zone=None):
+def build_chroma_filters(query_text, budget_max=None, zone=None, budget_min=None,
+                         area_min=None, area_max=None, max_price_per_sqft=None, bhk=None):
     conditions = []
+    if bhk:
+        # Per-BHK flags written by ingest.row_to_doc; a listing matches if it offers any requested BHK
+        flags = [{f"bhk_{int(b)}": {"$eq": True}} for b in sorted(set(bhk))]
+        conditions.append(flags[0] if len(flags) == 1 else {"$or": flags})
     if budget_max:
         conditions.append({"exact_price": {"$lte": budget_max}})
         conditions.append({"exact_price": {"$gt": 100}})
     if zone:
         conditions.append({"zone": {"$eq": str(zone)}})
+    if budget_min:
+        conditions.append({"exact_price": {"$gte": budget_min}})
+    if area_min:
+        conditions.append({"area": {"$gte": area_min}})
+    if area_max:
+        conditions.append({"area": {"$lte": area_max}})
+    if max_price_per_sqft:
+        conditions.append({"price_per_sqft": {"$lte": max_price_per_sqft}})
     
     cheap_words = ["cheap", "budget", "affordable", "low cost"]
     if any(w in query_text.lower() for w in cheap_words):
@@ -87,55 +239,140 @@ def build_chroma_filters(query_text, budget_max=None, zone=None):
         return conditions[0]
     return None
 
-def parse_bhk_from_metadata(bhk_val):
-    if not bhk_val: return []
-    if isinstance(bhk_val, list): return [int(x) for x in bhk_val if str(x).isdigit()]
-    try:
-        clean = str(bhk_val).replace("[", "").replace("]", "")
-        return [int(float(x)) for x in clean.split(",") if x.strip()]
-    except: return []
+def range_filters(req):
+    """
+    Explicit range constraints from the request, as build_chroma_filters kwargs.
+    """
+    return {
+        "budget_min": req.budget_min,
+        "area_min": req.area_min,
+        "area_max": req.area_max,
+        "max_price_per_sqft": req.max_price_per_sqft,
+    }
 
-# ======================================================================
-#                           SEARCH ENDPOINT
-# ======================================================================
-@app.post("/query")
-async def search_properties(req: QueryRequest):
-    
-    # 1. Retrieve History
-    history_str = get_formatted_history(req.user_id)
-    print(f"\n🧠 Context for {req.user_id}:\n{history_str}")
+def clean_bhk(value):
+    """
+    BHK filter as a sorted list of whole counts. The LLM may return 3, "2,3",
+    ["2", 3] or "2.5"; values that are not a whole number of rooms are dropped.
+    None when nothing valid is left.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    items = value if isinstance(value, (list, tuple, set)) else str(value).split(",")
+    out = set()
+    for item in items:
+        if isinstance(item, bool):
+            continue
+        try:
+            number = float(str(item).strip())
+        except ValueError:
+            continue
+        if number.is_integer() and 0 < number < 32:
+            out.add(int(number))
+    return sorted(out) or None
 
-    # 2. Hybrid Extraction (Using Groq)
-    extracted = extract_filters_llm(groq_client, req.query, history_str)
-
-    final_bhk = req.bhk or extracted.get("bhk")
+def merge_filters(req, extracted):
+    """
+    Request-level overrides win over extracted filters. Returns (bhk, budget, zone).
+    """
+    final_bhk = clean_bhk(req.bhk or extracted.get("bhk"))
     final_budget = req.budget_max or extracted.get("budget_max")
     final_zone = req.zone or extracted.get("zone")
 
     if not final_zone and extracted.get("locality"):
         final_zone = infer_zone_from_locality(extracted["locality"])
+    return final_bhk, final_budget, final_zone
 
-    print(f"🔍 Merged Query Filters: BHK={final_bhk}, Budget={final_budget}, Zone={final_zone}")
+def _encode_uncached(query):
+    query_text = f"Represent this sentence for searching properties: {query}"
+    return embed_model.encode(query_text, normalize_embeddings=True)
 
-    # 3. Embedding (Vector Search)
-    query_text = f"Represent this sentence for searching properties: {req.query}"
-    query_emb = embed_model.encode(query_text, normalize_embeddings=True).tolist()
+def encode_query(query):
+    return query_embedding_cache.get_or_compute(query, _encode_uncached).tolist()
 
-    # 4. DB filters
-    where_clause = build_chroma_filters(req.query, final_budget, final_zone)
+def encode_queries(queries):
+    """
+    Batch version of encode_query: cache hits are reused, all misses go
+    through a single embed_model.encode call.
+    """
+    vecs = [query_embedding_cache.get(q) for q in queries]
+    missing = {}
+    for i, v in enumerate(vecs):
+        if v is None:
+            missing.setdefault(EmbeddingCache.normalize(queries[i]), []).append(i)
 
-    # 5. Chroma retrieval
-    try:
-        results = collection.query(
-            query_embeddings=[query_emb],
-            n_results = 50,
-            where=where_clause
-        )
-    except Exception as e:
-        print("❌ Chroma Error:", e)
-        return {"answer": "Database error", "retrieved": []}
+    if missing:
+        keys = list(missing.keys())
+        texts = [f"Represent this sentence for searching properties: {queries[missing[k][0]]}" for k in keys]
+        embs = embed_model.encode(texts, normalize_embeddings=True, batch_size=32)
+        for k, emb in zip(keys, embs):
+            query_embedding_cache.put(k, emb)
+            for i in missing[k]:
+                vecs[i] = emb
+    return [v.tolist() for v in vecs]
+
+def query_index(query_embs, where_clause, n_results):
+    """
+    search_index.query(). With a MetadataStore the where clause is resolved
+    to candidate ids in memory and Chroma only searches those ids.
+    """
+    store = metadata_store
+    if store is None or not where_clause:
+        return search_index.query(query_embeddings=query_embs, n_results=n_results, where=where_clause)
+    ids = store.filter_ids(where_clause)
+    if not ids:
+        return {key: [[] for _ in query_embs] for key in ("ids", "documents", "metadatas", "distances")}
+    return search_index.query(query_embeddings=query_embs, n_results=n_results, ids=ids)
+
+def retrieve_many(query_embs, where_clause, n_results=RETRIEVAL_START_K):
+    """
+    One multi-embedding query; returns one single-query result dict per embedding.
+    """
+    res = query_index(query_embs, where_clause, n_results)
+    return [
+        {"ids": [res["ids"][j]], "documents": [res["documents"][j]], "metadatas": [res["metadatas"][j]]}
+        for j in range(len(query_embs))
+    ]
+
+def retrieve(query_emb, where_clause, n_results=RETRIEVAL_START_K):
+    return query_index([query_emb], where_clause, n_results)
 
-    # 6. Process Results
+def geo_filter(locality, radius_km=PROXIMITY_RADIUS_KM):
+    """
+    (lat, lon, radius_km) around the requested locality, or None when the
+    locality is unknown or the spatial index has no listing within the radius.
+    """
+    if not locality:
+        return None
+    lat, lon, _, _ = get_coords_for_locality(locality, COORDS_FROM_MATCH)
+    if lat is None:
+        return None
+    if spatial_index.count_within(lat, lon, radius_km) == 0:
+        print(f"📍 No listings within {radius_km} km of {locality}, skipping the radius filter")
+        return None
+    return (lat, lon, radius_km)
+
+def with_geo(where_clause, geo):
+    """
+    Adds the bounding box of the geo circle to a where clause.
+    """
+    if not geo:
+        return where_clause
+    lat_min, lat_max, lon_min, lon_max = bounding_box(*geo)
+    conditions = [
+        {"lat": {"$gte": lat_min}}, {"lat": {"$lte": lat_max}},
+        {"lon": {"$gte": lon_min}}, {"lon": {"$lte": lon_max}},
+    ]
+    if where_clause:
+        conditions = (where_clause["$and"] if "$and" in where_clause else [where_clause]) + conditions
+    return {"$and": conditions}
+
+def process_results(results, geo):
+    """
+    Turns a Chroma result set into candidate docs. BHK and the geo bounding
+    box are already in the where clause; here only the exact radius check is
+    left for the box corners. Returns (docs, survivors).
+    """
     raw_docs = []
     ids = results.get("ids", [[]])[0]
     if ids:
@@ -143,55 +380,68 @@ async def search_properties(req: QueryRequest):
             meta = results["metadatas"][0][i]
             text = results["documents"][0][i]
             doc_id = results["ids"][0][i]
-
-            if final_bhk:
-                prop_bhks = parse_bhk_from_metadata(meta.get("bhk_list"))
-                if not set(final_bhk).intersection(prop_bhks):
-                    continue
             raw_docs.append({"id": doc_id, "text": text, "metadata": meta})
 
     # Proximity Logic
-    user_loc = extracted.get("locality")
-    proximity_docs = []
-    if user_loc:
-        user_lat, user_lon, _, _ = get_coords_for_locality(user_loc)
-        if user_lat:
-            for d in raw_docs:
-                prop_loc = d["metadata"].get("locality", "").lower()
-                plat, plon, _, _ = get_coords_for_locality(prop_loc)
-                if plat and is_within_radius(user_lat, user_lon, plat, plon, radius_km=6.5):
-                    proximity_docs.append(d)
-    if proximity_docs:
-        raw_docs = proximity_docs
+    if geo:
+        user_lat, user_lon, radius_km = geo
+        near = within_radius_mask(
+            user_lat, user_lon,
+            [d["metadata"].get("lat") for d in raw_docs],
+            [d["metadata"].get("lon") for d in raw_docs],
+            radius_km
+        )
+        raw_docs = [d for d, keep in zip(raw_docs, near) if keep]
+    return raw_docs, len(raw_docs)
 
-    if not raw_docs:
-        conversation_store[req.user_id].append({"role": "user", "content": req.query})
-        conversation_store[req.user_id].append({"role": "assistant", "content": "I couldn't find any properties matching those exact criteria."})
-        return {"answer": "I couldn't find any properties matching those specific criteria.", "retrieved": []}
+def retrieve_adaptive(query_emb, where_clause, geo, first_results=None):
+    """
+    Starts at RETRIEVAL_START_K and doubles n_results until RETRIEVAL_MIN_SURVIVORS
+    candidates pass the post-filters, the filtered corpus is exhausted,
+    RETRIEVAL_MAX_K is reached or RETRIEVAL_TIME_BUDGET_MS has elapsed.
+    `first_results` (a depth RETRIEVAL_START_K result for with_geo(where_clause, geo))
+    skips the first query. If nothing near the locality matches the other
+    filters, the radius is dropped. Returns (docs, depth).
+    """
+    docs, depth = _deepen(query_emb, with_geo(where_clause, geo), geo, first_results)
+    if not docs and geo:
+        print("📍 Nothing within the radius matches the other filters, dropping it")
+        docs, depth = _deepen(query_emb, where_clause, None)
+    return docs, depth
 
-    # 7. Rerank (Using Groq)
-    reranked = rerank(groq_client, req.query, raw_docs, top_k=min(20, len(raw_docs)))
-    
-    # 8. Scoring
-    final_list = []
+def _deepen(query_emb, where_clause, geo, first_results=None):
+    start = time.perf_counter()
+    k = RETRIEVAL_START_K
+    results = first_results if first_results is not None else retrieve(query_emb, where_clause, n_results=k)
+    while True:
+        docs, survivors = process_results(results, geo)
+        exhausted = len(results.get("ids", [[]])[0]) < k
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if survivors >= RETRIEVAL_MIN_SURVIVORS or exhausted or k >= RETRIEVAL_MAX_K or elapsed_ms >= RETRIEVAL_TIME_BUDGET_MS:
+            return docs, k
+        k = min(k * 2, RETRIEVAL_MAX_K)
+        print(f"🔁 Only {survivors} candidates survived the filters, deepening to k={k}")
+        results = retrieve(query_emb, where_clause, n_results=k)
+
+def score_candidates(reranked, user_context, top_k):
+    final_list = list(reranked)
     max_sim = max([x.get("score", 0) for x in reranked]) if reranked else 1
 
-    for d in reranked:
-        sim_norm = d["score"] / max_sim if max_sim > 0 else 0.5
-        meta = d["metadata"]
-        user_context = {
-            "budget_max": final_budget,
-            "bhk": final_bhk,
-            "zone": final_zone,
-            "locality": extracted.get("locality")
-        }
-        d["final_score"] = compute_final_score(meta, user_context, sim_score=sim_norm)
-        final_list.append(d)
+    sims = [d["score"] / max_sim if max_sim > 0 else 0.5 for d in final_list]
+    # Precomputed boosts by listing id; NaN rows fall back to a text scan
+    kw = np.full((len(final_list), 2), np.nan)
+    for i, d in enumerate(final_list):
+        row = keyword_rows.get(d.get("id"))
+        if row is not None:
+            kw[i] = keyword_boost_matrix[row]
+    scores = compute_final_scores_for([d["metadata"] for d in final_list], user_context, sims, keyword_boosts=kw)
+    for d, score in zip(final_list, scores.tolist()):
+        d["final_score"] = score
 
     final_list.sort(key=lambda x: x["final_score"], reverse=True)
-    topk = final_list[: req.top_k or 5]
+    return final_list[: top_k or 5]
 
-    # 9. LLM Summary (Using Groq)
+def build_summary_messages(history_str, query, topk):
     context_parts = []
     for d in topk:
         md = d["metadata"]
@@ -208,33 +458,330 @@ async def search_properties(req: QueryRequest):
     system_msg = "You are an expert Real Estate advisor."
     user_msg = (
         f"Conversation History:\n{history_str}\n\n"
-        f"User's Latest Query: {req.query}\n\n"
+        f"User's Latest Query: {query}\n\n"
         f"Properties Found:\n{context_text}\n\n"
         f"Provide a helpful recommendation or answer based on these properties."
     )
-  
+    return [
+        {"role": "system", "content": system_msg},
+        {"role": "user", "content": user_msg}
+    ]
+
+# ======================================================================
+#                           SEARCH PIPELINE
+# ======================================================================
+NO_RESULTS_ANSWER = "I couldn't find any properties matching those specific criteria."
+SUMMARY_FALLBACK = "Here are the best matching properties."
+
+async def search_pipeline(req: QueryRequest, history_str: str, ctx: dict):
+    """
+    Runs extraction -> retrieval -> rerank -> scoring and yields
+    (event, payload) pairs as soon as each stage is ready:
+      ("filters", {...}), ("retrieved", [...]), then ("summary", str) on a
+      semantic cache hit, or ("answer", str) on early exit.
+    ctx["semantic_key"] is set when the final answer may be cached.
+    """
+    # Pick up a re-indexed corpus before retrieving (throttled)
+    version = await refresh_index_version()
+
+    # 2. Hybrid Extraction (Using Groq)
+    # In speculative mode the Groq round trip is in flight while we embed
+    # the query and retrieve with the regex (fallback) filters.
+    spec_where, spec_geo, spec_results = None, None, None
+    if SPECULATIVE_RETRIEVAL:
+        llm_task = asyncio.create_task(extract_filters_llm_async(async_groq_client, req.query, history_str))
+        try:
+            spec_extracted = fallback_extract(req.query)
+            spec_bhk, spec_budget, spec_zone = merge_filters(req, spec_extracted)
+            spec_where = build_chroma_filters(req.query, spec_budget, spec_zone, bhk=spec_bhk, **range_filters(req))
+            spec_geo = geo_filter(spec_extracted.get("locality"))
+            query_emb = await run_blocking(encode_query, req.query)
+        except BaseException:
+            # Encode failed (or the request was cancelled): don't leave the Groq call orphaned
+            llm_task.cancel()
+            raise
+        try:
+            spec_results = await run_blocking(retrieve, query_emb, with_geo(spec_where, spec_geo))
+        except Exception as e:
+            print("⚠️ Speculative Chroma query failed:", e)
 
+        extracted = await llm_task
+    else:
+        # 3. Embedding (Vector Search), overlapped with the extraction call
+        extracted, query_emb = await asyncio.gather(
+            extract_filters_llm_async(async_groq_client, req.query, history_str),
+            run_blocking(encode_query, req.query),
+        )
+
+    final_bhk, final_budget, final_zone = merge_filters(req, extracted)
+
+    print(f"🔍 Merged Query Filters: BHK={final_bhk}, Budget={final_budget}, Zone={final_zone}")
+    yield "filters", {
+        "bhk": final_bhk,
+        "budget_max": final_budget,
+        "zone": final_zone,
+        "locality": extracted.get("locality")
+    }
+
+    # 4. DB filters
+    where_clause = build_chroma_filters(req.query, final_budget, final_zone, bhk=final_bhk, **range_filters(req))
+
+    # 4b. Semantic answer cache: skipped for follow-ups that lean on history
+    if semantic_cache is not None and not extracted.get("refers_to_history"):
+        filters_key = json.dumps({
+            "where": where_clause,
+            "bhk": sorted(final_bhk) if final_bhk else None,
+            "locality": (extracted.get("locality") or "").lower(),
+            "top_k": req.top_k
+        }, sort_keys=True)
+        hit = semantic_cache.lookup(query_emb, filters_key, version)
+        if hit:
+            print(f"🎯 Semantic cache hit (cos={hit['similarity']:.3f})")
+            ctx["retrieval_depth"] = hit["retrieval_depth"]
+            yield "retrieved", hit["retrieved"]
+            yield "summary", hit["summary"]
+            return
+        if not history_str:
+            ctx["semantic_key"] = (query_emb, filters_key, version)
+
+    # 5. Chroma retrieval (reuse speculative candidates when the filters agree)
+    # 6. Post-filters, deepening the candidate pool while too few survive
+    geo = geo_filter(extracted.get("locality"))
+    first_results = None
+    if spec_results is not None and where_clause == spec_where and geo == spec_geo:
+        print("♻️ Speculative retrieval matched LLM filters, reusing candidates")
+        first_results = spec_results
+    try:
+        raw_docs, ctx["retrieval_depth"] = await run_blocking(
+            retrieve_adaptive, query_emb, where_clause, geo, first_results
+        )
+    except Exception as e:
+        print("❌ Chroma Error:", e)
+        yield "answer", "Database error"
+        return
+
+    if not raw_docs:
+        conversation_store[req.user_id].append({"role": "user", "content": req.query})
+        conversation_store[req.user_id].append({"role": "assistant", "content": "I couldn't find any properties matching those exact criteria."})
+        yield "answer", NO_RESULTS_ANSWER
+        return
+
+    # 7. Rerank (Groq or local cross-encoder, see RERANK_BACKEND)
+    reranked = await rerank_async(async_groq_client, req.query, raw_docs, top_k=min(20, len(raw_docs)), executor=cpu_executor)
+    
+    # 8. Scoring
+    user_context = {
+        "budget_max": final_budget,
+        "bhk": final_bhk,
+        "zone": final_zone,
+        "locality": extracted.get("locality")
+    }
+    topk = await run_blocking(score_candidates, reranked, user_context, req.top_k)
+    yield "retrieved", topk
+
+async def summarize(history_str, query, topk):
     try:
-        resp = groq_client.chat.completions.create(
+        resp = await async_groq_client.chat.completions.create(
             model=GROQ_MODEL,
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": user_msg}
-            ],
+            messages=build_summary_messages(history_str, query, topk),
             temperature=0.7
         )
-        summary = resp.choices[0].message.content
+        return resp.choices[0].message.content
     except Exception as e:
         print(f"❌ Groq Summary Error: {e}")
-        summary = "Here are the best matching properties."
+        return SUMMARY_FALLBACK
+
+def remember_turn(user_id, query, summary):
+    conversation_store[user_id].append({"role": "user", "content": query})
+    conversation_store[user_id].append({"role": "assistant", "content": summary})
+
+def cache_answer(ctx, topk, summary):
+    if semantic_cache is not None and ctx.get("semantic_key") and summary != SUMMARY_FALLBACK:
+        semantic_cache.store(*ctx["semantic_key"], topk, summary, ctx.get("retrieval_depth"))
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# ======================================================================
+#                           SEARCH ENDPOINT
+# ======================================================================
+@app.post("/query")
+async def search_properties(req: QueryRequest):
+    
+    # 1. Retrieve History
+    history_str = get_formatted_history(req.user_id)
+    print(f"\n🧠 Context for {req.user_id}:\n{history_str}")
+
+    topk, summary, ctx = [], None, {}
+    async for event, payload in search_pipeline(req, history_str, ctx):
+        if event == "answer":
+            return {"answer": payload, "retrieved": [], "retrieval_depth": ctx.get("retrieval_depth")}
+        if event == "retrieved":
+            topk = payload
+        if event == "summary":
+            summary = payload
+
+    # 9. LLM Summary (Using Groq), unless served from the semantic cache
+    if summary is None:
+        summary = await summarize(history_str, req.query, topk)
+        cache_answer(ctx, topk, summary)
     
     # 10. Update History
-    conversation_store[req.user_id].append({"role": "user", "content": req.query})
-    conversation_store[req.user_id].append({"role": "assistant", "content": summary})
+    remember_turn(req.user_id, req.query, summary)
+
+    return {"answer": summary, "retrieved": topk, "retrieval_depth": ctx.get("retrieval_depth")}
+
+@app.post("/query/stream")
+async def search_properties_stream(req: QueryRequest):
+    """
+    Server-sent events variant of /query. Emits, in order:
+      filters -> retrieved -> token* (summary, streamed from Groq) -> done
+    """
+    async def event_stream():
+        history_str = get_formatted_history(req.user_id)
+
+        topk, ctx = [], {}
+        async for event, payload in search_pipeline(req, history_str, ctx):
+            if event == "answer":
+                yield sse_event("retrieved", [])
+                yield sse_event("done", {"answer": payload, "retrieval_depth": ctx.get("retrieval_depth")})
+                return
+            if event == "summary":
+                # Semantic cache hit: the whole answer is already known
+                remember_turn(req.user_id, req.query, payload)
+                yield sse_event("token", {"text": payload})
+                yield sse_event("done", {"answer": payload, "retrieval_depth": ctx.get("retrieval_depth")})
+                return
+            yield sse_event(event, payload)
+            if event == "retrieved":
+                topk = payload
+
+        parts = []
+        try:
+            stream = await async_groq_client.chat.completions.create(
+                model=GROQ_MODEL,
+                messages=build_summary_messages(history_str, req.query, topk),
+                temperature=0.7,
+                stream=True
+            )
+            async for chunk in stream:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    parts.append(token)
+                    yield sse_event("token", {"text": token})
+            summary = "".join(parts)
+            cache_answer(ctx, topk, summary)
+        except Exception as e:
+            print(f"❌ Groq Summary Error: {e}")
+            summary = "".join(parts) or SUMMARY_FALLBACK
+            if not parts:
+                yield sse_event("token", {"text": summary})
+
+        remember_turn(req.user_id, req.query, summary)
+        yield sse_event("done", {"answer": summary, "retrieval_depth": ctx.get("retrieval_depth")})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/query/batch")
+async def search_properties_batch(batch: BatchQueryRequest):
+    """
+    Runs many searches in one call: one batched encode, one Chroma query per
+    distinct where clause, then rerank/summary fanned out with bounded concurrency.
+    Results come back in request order.
+    """
+    reqs = batch.queries
+    if not reqs:
+        return {"results": []}
+    sem = asyncio.Semaphore(batch.max_concurrency)
+
+    async def bounded(coro):
+        async with sem:
+            return await coro
+
+    # 1. History + extraction (Groq or fast path) for every query
+    histories = [get_formatted_history(r.user_id) for r in reqs]
+    extracted_all = await asyncio.gather(*[
+        bounded(extract_filters_llm_async(async_groq_client, r.query, h)) for r, h in zip(reqs, histories)
+    ])
+
+    # 2. Single batched encode (and pick up a re-indexed corpus, throttled)
+    query_embs = await run_blocking(encode_queries, [r.query for r in reqs])
+    await refresh_index_version()
+
+    # 3. One multi-embedding Chroma query per distinct where clause
+    filters_all = [merge_filters(r, e) for r, e in zip(reqs, extracted_all)]
+    groups, where_all, geo_all = {}, [], []
+    for i, (r, (bhk, budget, zone)) in enumerate(zip(reqs, filters_all)):
+        where_clause = build_chroma_filters(r.query, budget, zone, bhk=bhk, **range_filters(r))
+        geo = geo_filter(extracted_all[i].get("locality"))
+        where_all.append(where_clause)
+        geo_all.append(geo)
+        geo_where = with_geo(where_clause, geo)
+        groups.setdefault(json.dumps(geo_where, sort_keys=True), (geo_where, []))[1].append(i)
+
+    results_all = [None] * len(reqs)
+    for where_clause, idxs in groups.values():
+        try:
+            per_query = await run_blocking(retrieve_many, [query_embs[i] for i in idxs], where_clause)
+            for i, res in zip(idxs, per_query):
+                results_all[i] = res
+        except Exception as e:
+            print("❌ Chroma Error:", e)
+
+    # 4. Post-filter, rerank, score, summarize (bounded fan-out)
+    async def finish(i):
+        req, history_str, extracted = reqs[i], histories[i], extracted_all[i]
+        final_bhk, final_budget, final_zone = filters_all[i]
+        if results_all[i] is None:
+            return {"answer": "Database error", "retrieved": [], "retrieval_depth": None}
+
+        try:
+            raw_docs, depth = await run_blocking(
+                retrieve_adaptive, query_embs[i], where_all[i], geo_all[i], results_all[i]
+            )
+        except Exception as e:
+            print("❌ Chroma Error:", e)
+            return {"answer": "Database error", "retrieved": [], "retrieval_depth": None}
+        if not raw_docs:
+            remember_turn(req.user_id, req.query, "I couldn't find any properties matching those exact criteria.")
+            return {"answer": NO_RESULTS_ANSWER, "retrieved": [], "retrieval_depth": depth}
+
+        reranked = await rerank_async(async_groq_client, req.query, raw_docs, top_k=min(20, len(raw_docs)), executor=cpu_executor)
+        user_context = {
+            "budget_max": final_budget,
+            "bhk": final_bhk,
+            "zone": final_zone,
+            "locality": extracted.get("locality")
+        }
+        topk = await run_blocking(score_candidates, reranked, user_context, req.top_k)
+
+        summary = None
+        if batch.include_summary:
+            summary = await summarize(history_str, req.query, topk)
+            remember_turn(req.user_id, req.query, summary)
+        return {"answer": summary, "retrieved": topk, "retrieval_depth": depth}
+
+    results = await asyncio.gather(*[bounded(finish(i)) for i in range(len(reqs))])
+    return {"results": results}
+
+@app.get("/metrics")
+async def get_metrics():
+    return {
+        "embedding_cache": query_embedding_cache.stats(),
+        "semantic_cache": semantic_cache.stats() if semantic_cache else None,
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "extraction_paths": dict(EXTRACTION_STATS)
+    }
 
-    return {"answer": summary, "retrieved": topk}
+@app.on_event("shutdown")
+def persist_caches():
+    query_embedding_cache.save()
 
 @app.post("/feedback")
 async def submit_feedback(req: FeedbackRequest):
-    save_feedback(req.user_id, req.doc_id, req.liked)
+    await run_blocking(save_feedback, req.user_id, req.doc_id, req.liked)
     return {"status": "success"}
@@ -1,12 +1,10 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import requests
 import uuid
 import altair as alt
 import textwrap
 import json
-import time
 
 # --- 1. PAGE CONFIGURATION ---
 st.set_page_config(
@@ -237,19 +235,31 @@ def get_color(score):
     if score >= 70: return "#f1c40f"
     return "#ff0055"
 
-def query_backend_api(query):
+def stream_backend_api(query):
+    """
+    Consumes the /query/stream SSE endpoint and yields (event, data) pairs.
+    Errors are surfaced as a final ("done", {"answer": ...}) event.
+    """
     payload = {"user_id": st.session_state.user_id, "query": query, "top_k": 10}
     try:
-        response = requests.post(f"{API_URL}/query", json=payload, timeout=90)
-        if response.status_code == 200:
-            return response.json()
-        return {"answer": f"⚠️ Server Error: {response.status_code}", "retrieved": []}
+        with requests.post(f"{API_URL}/query/stream", json=payload, stream=True, timeout=(5, 90)) as response:
+            if response.status_code != 200:
+                yield "done", {"answer": f"⚠️ Server Error: {response.status_code}"}
+                return
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:") and event:
+                    yield event, json.loads(line[len("data:"):].strip())
     except requests.exceptions.ReadTimeout:
-        return {"answer": "⚠️ Server took too long to respond (>90s). The AI is thinking hard!", "retrieved": []}
+        yield "done", {"answer": "⚠️ Server took too long to respond (>90s). The AI is thinking hard!"}
     except requests.exceptions.ConnectionError:
-        return {"answer": f"⚠️ Cannot connect to {API_URL}. Is the backend running?", "retrieved": []}
+        yield "done", {"answer": f"⚠️ Cannot connect to {API_URL}. Is the backend running?"}
     except Exception as e:
-        return {"answer": f"⚠️ Error: {str(e)}", "retrieved": []}
+        yield "done", {"answer": f"⚠️ Error: {str(e)}"}
 
 def render_listing_card(item):
     meta = item.get("metadata", {})
@@ -310,6 +320,38 @@ def render_listing_card(item):
     """
     return textwrap.dedent(html).replace("\n", " ")
 
+def render_results(items):
+    if items:
+        chart_data = []
+        for i in items:
+            meta = i.get("metadata", {})
+            try:
+                p_val = float(meta.get("exact_price", 0))
+            except:
+                p_val = 0
+            chart_data.append({
+                "title": meta.get("title", "Property"),
+                "price": p_val,
+                "score": i.get("final_score", 0)
+            })
+
+        if chart_data:
+            df_chart = pd.DataFrame(chart_data)
+            with st.expander("📊 Market Scatter Plot", expanded=True):
+                chart = alt.Chart(df_chart).mark_circle(size=120).encode(
+                    x=alt.X('price', axis=alt.Axis(title='Price (INR)', format='~s')),
+                    y=alt.Y('score', scale=alt.Scale(domain=[40, 100]), axis=alt.Axis(title='Rec. Score')),
+                    color=alt.Color('score', scale=alt.Scale(scheme='viridis'), legend=None),
+                    tooltip=['title', 'price', 'score']
+                ).interactive().properties(height=320)
+                st.altair_chart(chart, use_container_width=True)
+
+        st.markdown("<br>", unsafe_allow_html=True)
+        cols = st.columns(2)
+        for idx, item in enumerate(items):
+            with cols[idx % 2]:
+                st.markdown(render_listing_card(item), unsafe_allow_html=True)
+
 # --- 5. UI LAYOUT ---
 
 st.markdown("""
@@ -332,37 +374,7 @@ for msg in st.session_state.messages:
             st.write(msg["content"])
             
             if "retrieved_data" in msg:
-                items = msg["retrieved_data"]
-                if items:
-                    chart_data = []
-                    for i in items:
-                        meta = i.get("metadata", {})
-                        try:
-                            p_val = float(meta.get("exact_price", 0))
-                        except:
-                            p_val = 0
-                        chart_data.append({
-                            "title": meta.get("title", "Property"),
-                            "price": p_val,
-                            "score": i.get("final_score", 0)
-                        })
-                    
-                    if chart_data:
-                        df_chart = pd.DataFrame(chart_data)
-                        with st.expander("📊 Market Scatter Plot", expanded=True):
-                             chart = alt.Chart(df_chart).mark_circle(size=120).encode(
-                                x=alt.X('price', axis=alt.Axis(title='Price (INR)', format='~s')),
-                                y=alt.Y('score', scale=alt.Scale(domain=[40, 100]), axis=alt.Axis(title='Rec. Score')),
-                                color=alt.Color('score', scale=alt.Scale(scheme='viridis'), legend=None),
-                                tooltip=['title', 'price', 'score']
-                            ).interactive().properties(height=320)
-                             st.altair_chart(chart, use_container_width=True)
-
-                    st.markdown("<br>", unsafe_allow_html=True)
-                    cols = st.columns(2)
-                    for idx, item in enumerate(items):
-                        with cols[idx % 2]:
-                            st.markdown(render_listing_card(item), unsafe_allow_html=True)
+                render_results(msg["retrieved_data"])
 
 # QUICK ACTIONS
 if st.session_state.messages and st.session_state.messages[-1]["role"] == "assistant":
@@ -388,12 +400,27 @@ if prompt := st.chat_input("Ask about location, budget (e.g., '2 BHK in Indirana
 
 if st.session_state.messages and st.session_state.messages[-1]["role"] == "user":
     user_query = st.session_state.messages[-1]["content"]
-    with st.spinner("Connecting to Neural Grid... (This may take a moment)"):
-        api_response = query_backend_api(user_query)
-        ai_text = api_response.get("answer", "No response text.")
-        retrieved_items = api_response.get("retrieved", [])
-        msg_payload = {"role": "assistant", "content": ai_text}
-        if retrieved_items:
-            msg_payload["retrieved_data"] = retrieved_items
-        st.session_state.messages.append(msg_payload)
-        st.rerun()
\ No newline at end of file
+    # Stream the response: listings render as soon as they arrive, the summary token by token
+    with st.chat_message("assistant"):
+        status = st.empty()
+        status.caption("Connecting to Neural Grid... (This may take a moment)")
+        text_slot = st.empty()
+        ai_text, retrieved_items = "", []
+        for event, data in stream_backend_api(user_query):
+            if event == "filters":
+                found = {k: v for k, v in data.items() if v}
+                status.caption(f"🔍 Filters: {found}" if found else "🔍 Searching all listings...")
+            elif event == "retrieved":
+                retrieved_items = data
+                if retrieved_items:
+                    render_results(retrieved_items)
+            elif event == "token":
+                ai_text += data.get("text", "")
+                text_slot.write(ai_text)
+            elif event == "done":
+                ai_text = data.get("answer") or ai_text or "No response text."
+    msg_payload = {"role": "assistant", "content": ai_text}
+    if retrieved_items:
+        msg_payload["retrieved_data"] = retrieved_items
+    st.session_state.messages.append(msg_payload)
+    st.rerun()
@@ -0,0 +1,78 @@
+"""
+Concurrency benchmark for the /query endpoint.
+
+Fires the same mix of queries at increasing in-flight levels and reports
+throughput + latency percentiles. Start the API first:
+
+    uvicorn api:app --port 8000
+    python bench_concurrency.py --url http://127.0.0.1:8000 --levels 1 2 4 8 16
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+QUERIES = [
+    "Show me 3 BHK apartments in Whitefield",
+    "2 BHK in HSR Layout under 1.2 Cr",
+    "Affordable flats near Electronic City",
+    "Villa with a garden in North Bangalore",
+    "Show properties with the highest investment score",
+]
+
+async def _worker(client, url, queue, latencies, errors):
+    while True:
+        try:
+            query = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        payload = {"user_id": f"bench-{uuid.uuid4()}", "query": query, "top_k": 5}
+        start = time.perf_counter()
+        try:
+            resp = await client.post(f"{url}/query", json=payload)
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(str(e))
+
+async def run_level(url, in_flight, n_requests, timeout):
+    queue = asyncio.Queue()
+    for i in range(n_requests):
+        queue.put_nowait(QUERIES[i % len(QUERIES)])
+
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=in_flight)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[_worker(client, url, queue, latencies, errors) for _ in range(in_flight)])
+        wall = time.perf_counter() - start
+
+    return wall, latencies, errors
+
+def _pct(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests-per-level", type=int, default=40)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    print(f"{'in-flight':>9} | {'req/s':>7} | {'p50 (s)':>8} | {'p95 (s)':>8} | {'mean (s)':>8} | errors")
+    print("-" * 64)
+    for level in args.levels:
+        wall, latencies, errors = await run_level(args.url, level, args.requests_per_level, args.timeout)
+        rps = len(latencies) / wall if wall > 0 else 0.0
+        mean = statistics.mean(latencies) if latencies else float("nan")
+        print(f"{level:>9} | {rps:>7.2f} | {_pct(latencies, 0.5):>8.2f} | {_pct(latencies, 0.95):>8.2f} | {mean:>8.2f} | {len(errors)}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Scalar vs vectorized haversine in distance_utils.
+
+For 10^3 .. 10^6 random points around Bangalore, times:
+  - one-to-many: a Python loop over the scalar math haversine vs distances_km
+  - radius search: loop + scalar check vs within_radius_mask (bbox prefilter + exact)
+  - many-to-many: every locality in LOCALITY_COORDS against every point (distance_matrix_km)
+
+    python bench_distance.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from distance_utils import EARTH_RADIUS_KM, distances_km, distance_matrix_km, within_radius_mask
+from locality_coords import LOCALITY_COORDS
+
+def scalar_haversine(lat1, lon1, lat2, lon2):
+    """The original per-pair math implementation."""
+    rlat1, rlon1 = math.radians(lat1), math.radians(lon1)
+    rlat2, rlon2 = math.radians(lat2), math.radians(lon2)
+    dlat = rlat2 - rlat1
+    dlon = rlon2 - rlon1
+    a = math.sin(dlat/2)**2 + math.cos(rlat1) * math.cos(rlat2) * math.sin(dlon/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    return EARTH_RADIUS_KM * c
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--radius", type=float, default=6.5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    center = (12.9716, 77.5946)
+    loc_lats = np.array([c[0] for c in LOCALITY_COORDS.values()])
+    loc_lons = np.array([c[1] for c in LOCALITY_COORDS.values()])
+
+    print(f"{'N':>8} | {'loop ms':>9} {'numpy ms':>9} {'speedup':>8} | {'radius loop':>11} {'radius np':>10} | "
+          f"{'matrix ' + str(len(loc_lats)) + 'xN ms':>16}")
+    for n in args.sizes:
+        lats = rng.uniform(12.7, 13.3, n)
+        lons = rng.uniform(77.3, 77.9, n)
+        lat_list, lon_list = lats.tolist(), lons.tolist()
+
+        loop, t_loop = timed(lambda: [scalar_haversine(*center, a, b) for a, b in zip(lat_list, lon_list)])
+        vec, t_vec = timed(distances_km, *center, lats, lons)
+        assert np.allclose(loop, vec)
+
+        near_loop, t_rloop = timed(lambda: [scalar_haversine(*center, a, b) <= args.radius for a, b in zip(lat_list, lon_list)])
+        near_vec, t_rvec = timed(within_radius_mask, *center, lats, lons, args.radius)
+        assert np.array_equal(np.array(near_loop), near_vec)
+
+        if n * len(loc_lats) <= 50_000_000:
+            _, t_mat = timed(distance_matrix_km, loc_lats, loc_lons, lats, lons)
+            mat = f"{t_mat:16.1f}"
+        else:
+            mat = f"{'(skipped, RAM)':>16}"
+
+        print(f"{n:>8} | {t_loop:9.1f} {t_vec:9.2f} {t_loop / t_vec:7.0f}x | {t_rloop:11.1f} {t_rvec:10.2f} | {mat}")
+
+if __name__ == "__main__":
+    main()
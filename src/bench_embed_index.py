@@ -0,0 +1,106 @@
+"""
+Pipeline check for embed_index.run_pipeline: a clean run into an in-memory
+Chroma collection, then failure paths (encoder raises, writer raises, reader
+raises) that must surface the error instead of hanging.
+
+Uses a hash-based stand-in encoder, so no model is loaded.
+
+    python bench_embed_index.py --docs 2000 --chunk 10
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import chromadb
+import numpy as np
+
+import embed_index
+
+DIM = 32
+
+class HashEncoder:
+    def encode(self, texts):
+        out = np.zeros((len(texts), DIM), dtype=np.float32)
+        for i, t in enumerate(texts):
+            out[i] = np.frombuffer(hashlib.sha256(t.encode("utf8")).digest(), dtype=np.uint8)[:DIM]
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+class RaisingEncoder(HashEncoder):
+    def __init__(self, after):
+        self.calls = 0
+        self.after = after
+
+    def encode(self, texts):
+        self.calls += 1
+        if self.calls > self.after:
+            raise RuntimeError("encoder failed")
+        return super().encode(texts)
+
+class RaisingCollection:
+    def add(self, **kwargs):
+        raise RuntimeError("writer failed")
+    upsert = add
+
+def write_docs(path, n):
+    with open(path, "w", encoding="utf8") as f:
+        for i in range(n):
+            f.write(json.dumps({"id": str(i), "text": f"listing {i} " * (1 + i % 7), "metadata": {"n": i}}) + "\n")
+
+def run_with_timeout(fn, timeout):
+    """(finished, exception) for fn() run on a daemon thread."""
+    result = {}
+    def target():
+        try:
+            fn()
+        except BaseException as e:
+            result["error"] = e
+    t = threading.Thread(target=target, daemon=True)
+    t.start()
+    t.join(timeout)
+    return not t.is_alive(), result.get("error")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--chunk", type=int, default=10, help="INDEX_READ_CHUNK (small values stress the queues)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    embed_index.DOCS_JSONL = os.path.join(tmp, "docs.jsonl")
+    embed_index.INDEX_READ_CHUNK = args.chunk
+    write_docs(embed_index.DOCS_JSONL, args.docs)
+    keep_all = lambda doc_id, meta: True
+
+    client = chromadb.EphemeralClient()
+    coll = client.create_collection("bench_pipeline", metadata={"hnsw:space": "cosine"})
+    _, written, stages, wall = embed_index.run_pipeline(coll, HashEncoder(), keep_all)
+    embed_index.report_pipeline(written, stages, wall)
+    failures = 0 if written == coll.count() == args.docs else 1
+    print(f"{'✅' if not failures else '❌'} clean run wrote {written}/{args.docs} documents")
+
+    class FailingReader(Exception):
+        pass
+    def failing_keep(doc_id, meta):
+        if int(doc_id) == args.docs // 2:
+            raise FailingReader("reader failed")
+        return True
+
+    cases = [
+        ("encoder raises", lambda: embed_index.run_pipeline(coll, RaisingEncoder(after=1), keep_all, write="upsert"), RuntimeError),
+        ("writer raises", lambda: embed_index.run_pipeline(RaisingCollection(), HashEncoder(), keep_all), RuntimeError),
+        ("reader raises", lambda: embed_index.run_pipeline(coll, HashEncoder(), failing_keep, write="upsert"), FailingReader),
+    ]
+    for name, fn, expected in cases:
+        finished, error = run_with_timeout(fn, args.timeout)
+        ok = finished and isinstance(error, expected)
+        failures += not ok
+        outcome = f"raised {type(error).__name__}: {error}" if finished else f"hung for {args.timeout:.0f}s"
+        print(f"{'✅' if ok else '❌'} {name:<15} {outcome}")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Golden-output check and throughput benchmark for fallback_extractor.
+
+The golden corpus (dataset/fallback_golden.jsonl) holds synthetic queries
+and the extract_with_confidence() output of the reference implementation.
+
+    python bench_fallback_extractor.py              # check against golden, then time
+    python bench_fallback_extractor.py --write      # regenerate the golden file
+
+Also reports how many template-style queries take the filter-extraction fast
+path (EXTRACTION_STATS), so GROQ_API_KEY must be set for the config import.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import time
+
+import fallback_extractor as fe
+from locality_map import SORTED_LOCALITIES
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataset", "fallback_golden.jsonl")
+
+BHK_PHRASES = [
+    "", "2 bhk", "3BHK", "three bhk", "two or three bhk", "2-3 bhk", "2 to 3 bed", "1, 2 or 3 bhk",
+    "studio", "2.5 bhk", "4 bedroom", "five bhk villa", "six bedrooms", "one rk", "bhk", "1 room",
+    "twone bhk", "someone said 2 bhk", "network of 3 bhk", "12-13 bhk", "2 - 4 bhk",
+]
+BUDGET_PHRASES = [
+    "", "under 1.5 cr", "below 80 lakhs", "within 1,20,00,000", "budget 5000000", "50k rent",
+    "upto 2 crore", "1.2cr", "90 lac", "max 75l", "price 9500000", "under budget", "less than 3 crores",
+    "around 1 cr", "65 lakh", "1,50,000 per month", "cost 2.25 cr",
+]
+LOCATION_PHRASES = ["in {}", "near {}", "around {}", "at {}", "{}", "close to {}", "in {} or {}"]
+NOISE = [
+    "", "apartments", "flats", "villa with a garden", "gated community", "ready to move",
+    "with gym and pool", "cheap", "show me", "something similar", "the same area", "near the metro",
+]
+
+# Template-like traffic the fast path is meant to serve without Groq
+EXAMPLE_QUERIES = [
+    "2 BHK in HSR under 1.2 Cr", "2 BHK in HSR Layout under 1.2 Cr", "3 BHK in Whitefield under 2 Cr",
+    "Show me 3 BHK apartments in Whitefield", "2 or 3 BHK in Koramangala below 80 lakhs",
+    "3bhk in indiranagar under 3 crores", "1 BHK near Electronic City within 45 lacs",
+    "2-3 BHK in Hebbal upto 1.5 cr", "three bhk villa in sarjapur road under 2.5 crore",
+]
+
+def build_corpus(n=3000, seed=7):
+    rng = random.Random(seed)
+    locs = SORTED_LOCALITIES + ["nowhere land", "bangalore", "Whitefeild", "hsr", "electronic city phase 1"]
+    queries = [
+        "Show me 3 BHK apartments in Whitefield", "2 BHK in HSR Layout under 1.2 Cr",
+        "Affordable flats near Electronic City", "Villa with a garden in North Bangalore",
+        "cheaper ones", "same but 3 bhk", "", "studio near koramangala",
+    ]
+    for _ in range(n):
+        loc_tpl = rng.choice(LOCATION_PHRASES)
+        loc = loc_tpl.format(*(rng.choice(locs) for _ in range(loc_tpl.count("{}")))) if rng.random() < 0.8 else ""
+        parts = [rng.choice(NOISE), rng.choice(BHK_PHRASES), loc, rng.choice(BUDGET_PHRASES)]
+        rng.shuffle(parts)
+        q = " ".join(p for p in parts if p)
+        if rng.random() < 0.3:
+            q = q.upper() if rng.random() < 0.5 else q.title()
+        queries.append(q)
+    return queries
+
+def write_golden(queries):
+    with open(GOLDEN_PATH, "w", encoding="utf8") as f:
+        for q in queries:
+            f.write(json.dumps({"query": q, "expected": fe.extract_with_confidence(q)}, ensure_ascii=False) + "\n")
+    print(f"💾 Wrote {len(queries)} golden cases to {GOLDEN_PATH}")
+
+def check_golden():
+    with open(GOLDEN_PATH, encoding="utf8") as f:
+        cases = [json.loads(line) for line in f]
+    failures = 0
+    for case in cases:
+        got = json.loads(json.dumps(fe.extract_with_confidence(case["query"])))
+        if got != case["expected"]:
+            failures += 1
+            if failures <= 10:
+                print(f"❌ {case['query']!r}\n   expected {case['expected']}\n   got      {got}")
+    print(f"{'✅' if not failures else '❌'} {len(cases) - failures}/{len(cases)} golden cases match")
+    return [c["query"] for c in cases], failures
+
+def report_fast_path(queries):
+    from filters_extractor import EXTRACTION_STATS, _fallback_first
+
+    EXTRACTION_STATS.clear()
+    misses = []
+    for q in queries:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, done = _fallback_first(True, q, "")
+        if not done:
+            misses.append(q)
+    rate = EXTRACTION_STATS["fast_path"] / len(queries)
+    print(f"⚡ Fast path on example queries: {EXTRACTION_STATS['fast_path']}/{len(queries)} ({rate:.0%})")
+    for q in misses:
+        print(f"   → LLM: {q!r} {fe.extract_with_confidence(q)['confidence']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--write", action="store_true", help="regenerate the golden file from the current implementation")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.write:
+        write_golden(build_corpus())
+        return
+
+    queries, failures = check_golden()
+    report_fast_path(EXAMPLE_QUERIES)
+    for name, fn in (("extract_all", fe.extract_all), ("extract_with_confidence", fe.extract_with_confidence)):
+        best = float("inf")
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            for q in queries:
+                fn(q)
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:<24} {len(queries) / best:10.0f} queries/s   ({best / len(queries) * 1e6:.1f} us/query)")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Byte-identity check and benchmark: columnar, chunked ingest.build_docs vs the
+original row-wise (iterrows + row_to_doc) builder on DATASET_PATH.
+
+    python bench_ingest.py --chunksize 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import ingest
+
+def timed_build(path, **kwargs):
+    start = time.perf_counter()
+    ingest.build_docs(path, keyword_matrix=False, **kwargs)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunksize", type=int, default=ingest.INGEST_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ref_path, new_path = os.path.join(tmp, "rowwise.jsonl"), os.path.join(tmp, "columnar.jsonl")
+        t_ref = timed_build(ref_path, rowwise=True)
+        t_new = timed_build(new_path, chunksize=args.chunksize)
+        with open(ref_path, "rb") as f:
+            ref = f.read().split(b"\n")
+        with open(new_path, "rb") as f:
+            new = f.read().split(b"\n")
+
+    bad = [i for i, (a, b) in enumerate(zip(ref, new)) if a != b]
+    identical = not bad and len(ref) == len(new)
+    print(f"{'✅' if identical else '❌'} {len(ref) - 1} rows, {len(bad)} differing lines, "
+          f"line counts {len(ref) - 1} vs {len(new) - 1}")
+    for i in bad[:3]:
+        print(f"   line {i + 1}:\n   rowwise  {ref[i][:300]!r}\n   columnar {new[i][:300]!r}")
+    print(f"rowwise {t_ref:.2f}s | columnar {t_new:.2f}s | speedup {t_ref / t_new:.1f}x")
+    raise SystemExit(0 if identical else 1)
+
+if __name__ == "__main__":
+    main()
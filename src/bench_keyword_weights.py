@@ -0,0 +1,98 @@
+"""
+Equivalence check and benchmark: compiled KeywordScorer and the sparse
+KeywordMatrix vs the original per-keyword regex loop in keyword_weights.
+
+Every listing in the dataset is scored three ways (title + " " as ranking
+does today, the full embedding text from DOCS_JSONL, and the raw
+description), and both implementations must agree exactly.
+
+    python bench_keyword_weights.py --rounds 3
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_CSV, DOCS_JSONL
+from keyword_matrix import KeywordMatrix, keyword_boosts
+from keyword_weights import KEYWORD_WEIGHTS, KeywordScorer, compute_keyword_scores, compute_keyword_scores_many
+
+def reference_keyword_scores(text: str):
+    """The original implementation, kept verbatim as the reference."""
+    if not text or not isinstance(text, str):
+        return 0.0, 0.0
+    t = text.lower()
+    liv = 0.0
+    inv = 0.0
+    sorted_keys = sorted(KEYWORD_WEIGHTS.keys(), key=len, reverse=True)
+    temp_text = t
+    for kw in sorted_keys:
+        pattern = r'\b' + re.escape(kw) + r'\b'
+        if re.search(pattern, temp_text):
+            l_boost, i_boost = KEYWORD_WEIGHTS[kw]
+            liv += l_boost
+            inv += i_boost
+            temp_text = re.sub(pattern, " ", temp_text)
+    liv = max(min(liv, 15.0), -5.0)
+    inv = max(min(inv, 15.0), -5.0)
+    return liv, inv
+
+def load_texts():
+    texts = {}
+    if os.path.exists(DOCS_JSONL):
+        with open(DOCS_JSONL, encoding="utf8") as f:
+            docs = [json.loads(line) for line in f]
+        texts["title"] = [str(d["metadata"].get("title", "")) + " " for d in docs]
+        texts["doc_text"] = [d["text"] for d in docs]
+    df = pd.read_csv(DATA_CSV)
+    texts["description"] = df["description"].tolist() if "description" in df.columns else []
+    return texts
+
+def best_of(rounds, fn, *args):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    failures = 0
+    for name, texts in load_texts().items():
+        ref = [reference_keyword_scores(t) for t in texts]
+        new = compute_keyword_scores_many(texts)
+        bad = [i for i, (a, b) in enumerate(zip(ref, new)) if a != b]
+        failures += len(bad)
+        print(f"{'✅' if not bad else '❌'} {name:<12} {len(texts) - len(bad)}/{len(texts)} identical")
+        for i in bad[:5]:
+            print(f"   {texts[i][:80]!r}: reference {ref[i]} vs compiled {new[i]}")
+
+        # Hit matrix: built once, then any re-weighting must match a fresh scorer
+        matrix = KeywordMatrix.build([str(i) for i in range(len(texts))], texts)
+        reweighted = {kw: (l * 1.5, i - 0.25) for kw, (l, i) in KEYWORD_WEIGHTS.items()}
+        for label, weights in (("matrix", KEYWORD_WEIGHTS), ("reweighted", reweighted)):
+            expected = np.array(KeywordScorer(weights).score_many(texts)).reshape(-1, 2)
+            got = keyword_boosts(matrix, weights)
+            n_bad = int((expected != got).any(axis=1).sum())
+            failures += n_bad
+            print(f"{'✅' if not n_bad else '❌'} {name + ' ' + label:<23} {len(texts) - n_bad}/{len(texts)} identical")
+
+        t_ref = best_of(args.rounds, lambda: [reference_keyword_scores(t) for t in texts])
+        t_one = best_of(args.rounds, lambda: [compute_keyword_scores(t) for t in texts])
+        t_many = best_of(args.rounds, compute_keyword_scores_many, texts)
+        t_mat = best_of(args.rounds, keyword_boosts, matrix, reweighted)
+        print(f"   reference {t_ref * 1000:8.1f} ms | compiled {t_one * 1000:8.1f} ms | "
+              f"batch {t_many * 1000:8.1f} ms | speedup {t_ref / t_one:5.1f}x | re-weight (matrix) {t_mat * 1000:6.2f} ms")
+
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
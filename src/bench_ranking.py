@@ -0,0 +1,93 @@
+"""
+Property check and benchmark: ranking.compute_final_scores_for (NumPy batch)
+vs the per-document reference ranking.compute_final_score.
+
+Random candidate sets cover missing fields, prices on and around the
+affordability breakpoints, budgets that are None/0/set, keyword-heavy text
+and similarities at 0 and 1. Every score must be identical.
+
+    python bench_ranking.py --cases 200 --size 2000
+"""
+import argparse
+import random
+import time
+
+from keyword_weights import KEYWORD_WEIGHTS, compute_keyword_scores_many
+from ranking import compute_final_score, compute_final_scores, compute_final_scores_for, keyword_text
+
+KEYWORDS = list(KEYWORD_WEIGHTS.keys())
+
+def random_meta(rng, budget):
+    meta = {}
+    if rng.random() < 0.9:
+        meta["livability_score"] = rng.choice([0, 50, 100, round(rng.uniform(0, 100), 1)])
+    if rng.random() < 0.9:
+        meta["investment_score"] = rng.choice([0, 50, 100, round(rng.uniform(0, 100), 1)])
+    if rng.random() < 0.9:
+        if budget and rng.random() < 0.5:
+            # On and around the 1.0 / 1.1 / 1.2 breakpoints
+            meta["exact_price"] = budget * rng.choice([1.0, 1.1, 1.2, rng.uniform(0.8, 1.3)])
+        else:
+            meta["exact_price"] = rng.choice([0, -1, rng.uniform(1e6, 5e7)])
+    words = rng.sample(KEYWORDS, rng.randint(0, 8)) + ["apartment", "in", "bangalore"]
+    rng.shuffle(words)
+    if rng.random() < 0.5:
+        meta["text"] = " ".join(words)
+    else:
+        meta["title"] = " ".join(words[:3])
+    return meta
+
+def random_case(rng, size):
+    budget = rng.choice([None, 0, 5_000_000, 12_000_000, rng.uniform(1e6, 4e7)])
+    metas = [random_meta(rng, budget) for _ in range(size)]
+    sims = [rng.choice([0.0, 0.5, 1.0, rng.random()]) for _ in range(size)]
+    return metas, {"budget_max": budget}, sims
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--size", type=int, default=2000, help="candidates in the timing run")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    checked = 0
+    for _ in range(args.cases):
+        metas, filters, sims = random_case(rng, rng.randint(1, 50))
+        ref = [compute_final_score(m, filters, sim_score=s) for m, s in zip(metas, sims)]
+        new = compute_final_scores_for(metas, filters, sims).tolist()
+        checked += len(ref)
+        for m, s, a, b in zip(metas, sims, ref, new):
+            if a != b:
+                failures += 1
+                if failures <= 10:
+                    print(f"❌ {m} sim={s} budget={filters['budget_max']}: reference {a} vs batch {b}")
+    print(f"{'✅' if not failures else '❌'} {checked - failures}/{checked} scores identical")
+
+    metas, filters, sims = random_case(rng, args.size)
+    start = time.perf_counter()
+    for m, s in zip(metas, sims):
+        compute_final_score(m, filters, sim_score=s)
+    t_ref = time.perf_counter() - start
+    start = time.perf_counter()
+    compute_final_scores_for(metas, filters, sims)
+    t_batch = time.perf_counter() - start
+
+    # With keyword boosts precomputed (e.g. from the keyword hit matrix)
+    kw = compute_keyword_scores_many([keyword_text(m) for m in metas])
+    columns = (
+        [float(m.get("livability_score", 50.0)) for m in metas],
+        [float(m.get("investment_score", 50.0)) for m in metas],
+        [float(m.get("exact_price", 0.0)) for m in metas],
+        sims, [k[0] for k in kw], [k[1] for k in kw],
+    )
+    start = time.perf_counter()
+    compute_final_scores(*columns, budget_max=filters["budget_max"])
+    t_arrays = time.perf_counter() - start
+    print(f"{args.size} candidates: reference {t_ref * 1000:.1f} ms | batch {t_batch * 1000:.1f} ms | "
+          f"batch, boosts precomputed {t_arrays * 1000:.2f} ms ({t_ref / t_arrays:.0f}x)")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares the Groq reranker with the local cross-encoder on real candidates.
+
+For each query we retrieve the top 20 listings from Chroma (same as /query),
+rerank them with both backends and report latency plus agreement:
+  - top-5 overlap: |top5(groq) & top5(local)| / 5
+  - Spearman rank correlation over all 20 candidates
+and checks that every cross-encoder score lies in [0, 1].
+
+    LLM_CACHE_BACKEND=off python bench_rerank.py --rounds 3
+"""
+import argparse
+import statistics
+import time
+
+import chromadb
+from sentence_transformers import SentenceTransformer
+
+from config import CHROMA_DIR, EMBEDDING_MODEL, groq_client
+import rerank as rr
+
+QUERIES = [
+    "Show me 3 BHK apartments in Whitefield",
+    "2 BHK in HSR Layout under 1.2 Cr",
+    "Affordable flats near Electronic City",
+    "Villa with a garden in North Bangalore",
+    "Gated community with a swimming pool near the metro",
+    "Ready to move 2 BHK near Manyata Tech Park",
+    "Luxury 4 BHK in Koramangala",
+    "Plots near the airport for investment",
+]
+
+def retrieve_candidates(collection, model, query, n=20):
+    emb = model.encode(f"Represent this sentence for searching properties: {query}", normalize_embeddings=True)
+    res = collection.query(query_embeddings=[emb.tolist()], n_results=n)
+    return [
+        {"id": i, "text": t, "metadata": m}
+        for i, t, m in zip(res["ids"][0], res["documents"][0], res["metadatas"][0])
+    ]
+
+def spearman(order_a, order_b):
+    """Spearman correlation between two rankings of the same id set."""
+    common = [x for x in order_a if x in set(order_b)]
+    n = len(common)
+    if n < 2:
+        return float("nan")
+    rank_b = {x: i for i, x in enumerate([x for x in order_b if x in set(common)])}
+    d2 = sum((i - rank_b[x]) ** 2 for i, x in enumerate(common))
+    return 1 - (6 * d2) / (n * (n * n - 1))
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3, help="timed repetitions per query")
+    args = parser.parse_args()
+
+    collection = chromadb.PersistentClient(path=str(CHROMA_DIR)).get_collection(name="listings")
+    model = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+    rr._get_cross_encoder()  # load outside the timed region
+
+    groq_ms, local_ms, overlaps, rhos = [], [], [], []
+    out_of_range = 0
+    for q in QUERIES:
+        docs = retrieve_candidates(collection, model, q)
+        for _ in range(args.rounds):
+            g, t_g = timed(rr._rerank_groq, groq_client, q, [d.copy() for d in docs], 20)
+            l, t_l = timed(rr._rerank_cross_encoder, None, q, [d.copy() for d in docs], 20)
+            groq_ms.append(t_g)
+            local_ms.append(t_l)
+
+        out_of_range += sum(not 0.0 <= d["score"] <= 1.0 for d in l)
+        g_ids, l_ids = [d["id"] for d in g], [d["id"] for d in l]
+        overlaps.append(len(set(g_ids[:5]) & set(l_ids[:5])) / 5)
+        rhos.append(spearman(g_ids, l_ids))
+        print(f"{q[:45]:<45} | top5 overlap {overlaps[-1]:.2f} | spearman {rhos[-1]:+.2f}")
+
+    print("\nLatency per rerank of 20 candidates (ms):")
+    for name, xs in (("groq", groq_ms), ("cross_encoder", local_ms)):
+        print(f"  {name:<14} p50 {statistics.median(xs):8.1f}   mean {statistics.mean(xs):8.1f}   max {max(xs):8.1f}")
+    print(f"\nAgreement: mean top-5 overlap {statistics.mean(overlaps):.2f}, "
+          f"mean spearman {statistics.mean(r for r in rhos if r == r):+.2f}")
+    print(f"{'✅' if not out_of_range else '❌'} cross-encoder scores in [0, 1] "
+          f"({out_of_range} out of range)")
+    raise SystemExit(1 if out_of_range else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Chroma (HNSW + SQLite metadata) vs NumpyIndex (exact matmul + argpartition).
+
+Synthetic corpora of normalized 768-d vectors with listing-like metadata are
+loaded into an in-memory Chroma collection and a NumpyIndex; each is then
+queried with and without a typical build_chroma_filters where clause.
+Reports p50/mean latency per query and Chroma's recall@k against the exact
+result, so we can see where (if anywhere) HNSW starts to pay off.
+
+    python bench_retrieval.py --sizes 3000 30000 300000 --queries 50
+"""
+import argparse
+import statistics
+import time
+
+import chromadb
+import numpy as np
+
+from numpy_index import NumpyIndex
+
+DIM = 768
+ZONES = ["East", "West", "North", "South", "Central"]
+WHERE = {"$and": [{"exact_price": {"$lte": 15000000}}, {"zone": {"$eq": "East"}}]}
+
+def make_corpus(n, rng):
+    embs = rng.standard_normal((n, DIM)).astype(np.float32)
+    embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+    prices = rng.integers(2_000_000, 60_000_000, size=n)
+    metas = [
+        {"exact_price": int(prices[i]), "zone": ZONES[i % len(ZONES)], "price_per_sqft": float(prices[i] / 1200)}
+        for i in range(n)
+    ]
+    ids = [str(i) for i in range(n)]
+    docs = [f"listing {i}" for i in range(n)]
+    return ids, embs, docs, metas
+
+def build_chroma(ids, embs, docs, metas, batch=5000):
+    client = chromadb.EphemeralClient()
+    try:
+        client.delete_collection("bench")
+    except Exception:
+        pass
+    coll = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+    for i in range(0, len(ids), batch):
+        coll.add(ids=ids[i:i + batch], embeddings=embs[i:i + batch], documents=docs[i:i + batch], metadatas=metas[i:i + batch])
+    return coll
+
+def time_queries(index, queries, k, where):
+    times, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        res = index.query(query_embeddings=[q.tolist()], n_results=k, where=where)
+        times.append((time.perf_counter() - start) * 1000)
+        results.append(res["ids"][0])
+    return times, results
+
+def recall(approx, exact):
+    return statistics.mean(len(set(a) & set(e)) / max(len(e), 1) for a, e in zip(approx, exact))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3000, 30000, 300000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=50, help="n_results, same as /query")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'N':>8} | {'filter':<6} | {'chroma p50':>10} {'mean':>8} | {'numpy p50':>10} {'mean':>8} | {'recall@k':>8}")
+    for n in args.sizes:
+        ids, embs, docs, metas = make_corpus(n, rng)
+        start = time.perf_counter()
+        coll = build_chroma(ids, embs, docs, metas)
+        build_s = time.perf_counter() - start
+        index = NumpyIndex(ids, embs, docs, metas)
+        queries = rng.standard_normal((args.queries, DIM)).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        for label, where in (("none", None), ("where", WHERE)):
+            index.query(queries[:1], n_results=args.k, where=where)  # warm the column cache
+            c_ms, c_ids = time_queries(coll, queries, args.k, where)
+            n_ms, n_ids = time_queries(index, queries, args.k, where)
+            print(f"{n:>8} | {label:<6} | {statistics.median(c_ms):10.2f} {statistics.mean(c_ms):8.2f} | "
+                  f"{statistics.median(n_ms):10.2f} {statistics.mean(n_ms):8.2f} | {recall(c_ids, n_ids):8.3f}")
+        print(f"{'':>8}   (chroma build {build_s:.1f}s, numpy matrix {embs.nbytes / 1e6:.0f} MB)")
+
+if __name__ == "__main__":
+    main()
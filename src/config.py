@@ -1,18 +1,93 @@
 import os
 from dotenv import load_dotenv
-from groq import Groq
+from groq import Groq, AsyncGroq
 
 load_dotenv()
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 DATA_CSV = os.path.join(BASE_DIR, "..", "dataset", "99_magic_listings_scored_final.csv")
+# Scored listings read by ingest.py: .csv, .parquet or .arrow (see dataset_io.py)
+DATASET_PATH = os.getenv("DATASET_PATH", DATA_CSV)
 CHROMA_DIR = os.path.join(BASE_DIR, "..", "data", "chroma_db")
 DOCS_JSONL = os.path.join(BASE_DIR, "..", "data", "docs.jsonl")
+KEYWORD_MATRIX_PATH = os.path.join(BASE_DIR, "..", "data", "keyword_hits")  # .npz + .vocab.json
 EMBEDDING_MODEL = "BAAI/bge-base-en-v1.5"
 
+# Rows per chunk when ingest.py streams DATA_CSV into DOCS_JSONL
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "5000"))
+
 COHERE_API_KEY = os.getenv("COHERE_API_KEY")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 groq_client = Groq(api_key=GROQ_API_KEY)
+async_groq_client = AsyncGroq(api_key=GROQ_API_KEY)
 GROQ_MODEL = "llama-3.3-70b-versatile"
+
+# Overlap the Groq filter extraction with embedding + a fallback-filtered retrieval
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "1") == "1"
+
+# Worker threads for blocking work in the API (encode, Chroma, MySQL)
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", "4"))
+
+# Query embedding LRU cache. Set EMBED_CACHE_PATH to persist it across restarts.
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH")
+
+# On-disk document embeddings for the indexer, keyed by (EMBEDDING_MODEL, text hash);
+# a full reindex only encodes texts it has not seen. "float16" halves the file size.
+EMBEDDING_STORE_ENABLED = os.getenv("EMBEDDING_STORE_ENABLED", "1") == "1"
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", os.path.join(BASE_DIR, "..", "data", "embedding_store"))
+EMBEDDING_STORE_DTYPE = os.getenv("EMBEDDING_STORE_DTYPE", "float32")
+
+# Indexer pipeline (embed_index): encoder processes, length-sorted batches capped at
+# EMBED_BATCH_CHARS characters / EMBED_MAX_BATCH texts, docs per read chunk and per Chroma write
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", str(max(1, (os.cpu_count() or 1) // 2))))
+EMBED_BATCH_CHARS = int(os.getenv("EMBED_BATCH_CHARS", "32000"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "128"))
+INDEX_READ_CHUNK = int(os.getenv("INDEX_READ_CHUNK", "2048"))
+INDEX_WRITE_BATCH = int(os.getenv("INDEX_WRITE_BATCH", "2048"))
+
+# Memoization of deterministic (temperature=0) Groq calls: "memory", "sqlite" or "off".
+# The sqlite backend is shared by all workers on the host.
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(BASE_DIR, "..", "data", "llm_cache.sqlite"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "10000"))
+
+# Skip the Groq filter extraction when the regex parser is confident about every field
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "1") == "1"
+FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.9"))
+
+# Reranker: "groq" (LLM round trip) or "cross_encoder" (local CPU model)
+RERANK_BACKEND = os.getenv("RERANK_BACKEND", "groq")
+CROSS_ENCODER_MODEL = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+CROSS_ENCODER_BACKEND = os.getenv("CROSS_ENCODER_BACKEND", "torch")  # "torch" or "onnx"
+CROSS_ENCODER_ONNX_FILE = os.getenv("CROSS_ENCODER_ONNX_FILE")  # e.g. an int8-quantized export
+CROSS_ENCODER_BATCH_SIZE = int(os.getenv("CROSS_ENCODER_BATCH_SIZE", "32"))
+
+# Semantic answer cache: reuse an answer when filters match exactly and the
+# query embeddings are at least this similar (cosine)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1000"))
+INDEX_VERSION_CHECK_SECS = float(os.getenv("INDEX_VERSION_CHECK_SECS", "30"))
+
+# Vector search engine: "chroma" (HNSW + SQLite metadata) or "numpy" (exact, in-memory)
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "chroma")
+# Chroma backend: resolve where clauses to candidate ids with the in-memory MetadataStore
+# and query Chroma by id instead of through its SQLite metadata filter
+METADATA_PREFILTER = os.getenv("METADATA_PREFILTER", "1") == "1"
+
+# Adaptive retrieval depth: start at RETRIEVAL_START_K hits and double until enough
+# candidates survive the post-filters, the cap is reached or the time budget runs out
+RETRIEVAL_START_K = int(os.getenv("RETRIEVAL_START_K", "30"))
+RETRIEVAL_MAX_K = int(os.getenv("RETRIEVAL_MAX_K", "480"))
+RETRIEVAL_MIN_SURVIVORS = int(os.getenv("RETRIEVAL_MIN_SURVIVORS", "20"))
+RETRIEVAL_TIME_BUDGET_MS = float(os.getenv("RETRIEVAL_TIME_BUDGET_MS", "300"))
+
+# Upper bound on /query/batch max_concurrency (concurrent Groq calls per batch request)
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+
+# "Near <locality>" radius for the proximity filter
+PROXIMITY_RADIUS_KM = float(os.getenv("PROXIMITY_RADIUS_KM", "6.5"))
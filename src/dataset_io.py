@@ -0,0 +1,173 @@
+# dataset_io.py
+"""
+Reading and writing listing tables as CSV, Parquet or Arrow IPC (Feather v2).
+
+The format follows the file suffix (.csv, .parquet, .arrow/.feather/.ipc).
+Parquet and Arrow files store BHK_List as a real list<int32> column and are
+read through memory maps. CSV remains the import/export format: BHK_List is
+written as the usual "[2, 3]" string and parsed back into a list when read,
+so every stage sees the same frame whatever the file format.
+"""
+import os
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+BHK_COLUMN = "BHK_List"
+BHK_TYPE = pa.list_(pa.int32())
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+# Text columns read as str from CSV, so chunked reads can't infer other dtypes per chunk
+TEXT_COLUMNS = ["title", "url", "description", "Extracted_Locality", "BHK_List", "Zone"]
+
+# ---------------------------
+# BHK column
+# ---------------------------
+def parse_bhk_string(bhk_str) -> List[int]:
+    """Parses '[2, 3]' (or a list/array of numbers) into a Python list of ints."""
+    if isinstance(bhk_str, (list, tuple, np.ndarray)):
+        return [int(x) for x in bhk_str]
+    if pd.isna(bhk_str) or str(bhk_str) == '[]':
+        return []
+    try:
+        clean = str(bhk_str).replace('[', '').replace(']', '')
+        # Handle floats like '2.0' converting to int '2'
+        return [int(float(x.strip())) for x in clean.split(',') if x.strip()]
+    except:
+        return []
+
+def bhk_lists(values) -> List[List[int]]:
+    """parse_bhk_string over a column; each distinct string is parsed once."""
+    cache = {}
+    out = []
+    for v in values:
+        if isinstance(v, str):
+            if v not in cache:
+                cache[v] = parse_bhk_string(v)
+            out.append(list(cache[v]))
+        else:
+            out.append(parse_bhk_string(v))
+    return out
+
+# ---------------------------
+# Paths
+# ---------------------------
+def table_format(path: str) -> str:
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".parquet":
+        return "parquet"
+    if suffix in ARROW_SUFFIXES:
+        return "arrow"
+    return "csv"
+
+def with_format(path: str, fmt: Optional[str] = None) -> str:
+    """
+    `path` with its suffix swapped for `fmt` (default: the DATASET_FORMAT env
+    var, "csv" when unset), e.g. my_updated.csv -> my_updated.parquet.
+    """
+    fmt = (fmt or os.getenv("DATASET_FORMAT", "csv")).lower()
+    suffix = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}[fmt]
+    return os.path.splitext(path)[0] + suffix
+
+# ---------------------------
+# Arrow <-> pandas
+# ---------------------------
+def to_arrow(df: pd.DataFrame) -> pa.Table:
+    columns, fields = [], []
+    for name in df.columns:
+        s = df[name]
+        if name == BHK_COLUMN:
+            arr = pa.array(bhk_lists(s.tolist()), type=BHK_TYPE)
+        elif s.dtype == object:
+            # Mixed object columns (e.g. numbers among strings) are stored as strings
+            arr = pa.array([None if pd.isna(v) else str(v) for v in s.tolist()], type=pa.string())
+        else:
+            arr = pa.Array.from_pandas(s)
+        columns.append(arr)
+        fields.append(pa.field(str(name), arr.type))
+    return pa.Table.from_arrays(columns, schema=pa.schema(fields))
+
+def from_arrow(table) -> pd.DataFrame:
+    df = table.to_pandas()
+    if BHK_COLUMN in table.column_names:
+        # Python lists rather than the numpy arrays to_pandas() gives list columns
+        df[BHK_COLUMN] = [v or [] for v in table.column(BHK_COLUMN).to_pylist()]
+    return df
+
+# ---------------------------
+# Read / write
+# ---------------------------
+def _read_csv(path, columns=None, **kwargs) -> pd.DataFrame:
+    header = pd.read_csv(path, nrows=0).columns
+    kwargs.setdefault("dtype", {c: str for c in TEXT_COLUMNS if c in header})
+    return pd.read_csv(path, usecols=columns, **kwargs)
+
+def _normalize_bhk(df: pd.DataFrame) -> pd.DataFrame:
+    if BHK_COLUMN in df.columns:
+        df[BHK_COLUMN] = bhk_lists(df[BHK_COLUMN].tolist())
+    return df
+
+def read_table(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Whole table as a DataFrame; BHK_List always comes back as lists of ints."""
+    fmt = table_format(path)
+    if fmt == "parquet":
+        return from_arrow(pq.read_table(path, columns=columns, memory_map=True))
+    if fmt == "arrow":
+        with pa.memory_map(path, "r") as source:
+            table = ipc.open_file(source).read_all()
+        return from_arrow(table.select(columns) if columns else table)
+    return _normalize_bhk(_read_csv(path, columns))
+
+def iter_tables(path: str, chunksize: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """read_table() in chunks of at most `chunksize` rows, for bounded memory."""
+    fmt = table_format(path)
+    if fmt == "parquet":
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=chunksize, columns=columns):
+            yield from_arrow(pa.Table.from_batches([batch]))
+    elif fmt == "arrow":
+        with pa.memory_map(path, "r") as source:
+            reader = ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                table = pa.Table.from_batches([reader.get_batch(i)])
+                if columns:
+                    table = table.select(columns)
+                for offset in range(0, table.num_rows, chunksize):
+                    yield from_arrow(table.slice(offset, chunksize))
+    else:
+        for chunk in _read_csv(path, columns, chunksize=chunksize):
+            yield _normalize_bhk(chunk)
+
+def write_table(df: pd.DataFrame, path: str, **csv_kwargs) -> None:
+    """
+    Writes by suffix. csv_kwargs (e.g. float_format) only apply to CSV, which
+    keeps pandas' usual output (BHK_List as "[2, 3]").
+    """
+    fmt = table_format(path)
+    if fmt == "parquet":
+        pq.write_table(to_arrow(df), path)
+    elif fmt == "arrow":
+        table = to_arrow(df)
+        with ipc.new_file(path, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        csv_kwargs.setdefault("index", False)
+        df.to_csv(path, **csv_kwargs)
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Convert a listings table between CSV, Parquet and Arrow IPC.")
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    frame = read_table(args.src)
+    write_table(frame, args.dst)
+    print(f"💾 Wrote {len(frame)} rows to {args.dst} ({os.path.getsize(args.dst) / 1e6:.2f} MB, "
+          f"from {os.path.getsize(args.src) / 1e6:.2f} MB) in {time.perf_counter() - start:.2f}s")
@@ -2,25 +2,94 @@
 import math
 from typing import Tuple
 
+import numpy as np
+
 EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = EARTH_RADIUS_KM * math.pi / 180
+
+# ---------------------------
+# Vectorized (NumPy) API
+# ---------------------------
+def _as_float_array(values) -> np.ndarray:
+    """None -> NaN, so missing coordinates come out as an infinite distance."""
+    arr = np.asarray(values)
+    if arr.dtype == object:
+        arr = np.where(arr == None, np.nan, arr)  # noqa: E711 (elementwise)
+    return arr.astype(np.float64, copy=False)
+
+def _haversine(rlat1, rlon1, rlat2, rlon2):
+    dlat = rlat2 - rlat1
+    dlon = rlon2 - rlon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(rlat1) * np.cos(rlat2) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    d = EARTH_RADIUS_KM * c
+    return np.where(np.isnan(d), np.inf, d)
+
+def distances_km(lat: float, lon: float, lats, lons) -> np.ndarray:
+    """
+    Haversine distance in km from one point to many (1-D arrays of lat/lon).
+    """
+    if lat is None or lon is None:
+        return np.full(np.shape(lats), np.inf)
+    lats, lons = _as_float_array(lats), _as_float_array(lons)
+    return _haversine(math.radians(lat), math.radians(lon), np.radians(lats), np.radians(lons))
+
+def distance_matrix_km(lats1, lons1, lats2, lons2) -> np.ndarray:
+    """
+    (len(lats1) x len(lats2)) haversine distance matrix in km, e.g. localities x listings.
+    """
+    rlat1 = np.radians(_as_float_array(lats1))[:, None]
+    rlon1 = np.radians(_as_float_array(lons1))[:, None]
+    rlat2 = np.radians(_as_float_array(lats2))[None, :]
+    rlon2 = np.radians(_as_float_array(lons2))[None, :]
+    return _haversine(rlat1, rlon1, rlat2, rlon2)
 
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    (lat_min, lat_max, lon_min, lon_max) enclosing the circle of radius_km around (lat, lon).
+    """
+    r = radius_km / EARTH_RADIUS_KM  # angular radius
+    dlat = math.degrees(r)
+    ratio = math.sin(r) / max(math.cos(math.radians(lat)), 1e-12)
+    dlon = math.degrees(math.asin(ratio)) if ratio < 1 else 180.0
+    eps = 1e-9  # keep points exactly on the circle inside the box
+    return lat - dlat - eps, lat + dlat + eps, lon - dlon - eps, lon + dlon + eps
+
+def bbox_mask(lat: float, lon: float, lats, lons, radius_km: float) -> np.ndarray:
+    """
+    Cheap prefilter: True where a point lies inside the bounding box of the circle.
+    """
+    lats, lons = _as_float_array(lats), _as_float_array(lons)
+    lat_min, lat_max, lon_min, lon_max = bounding_box(lat, lon, radius_km)
+    return (lats >= lat_min) & (lats <= lat_max) & (lons >= lon_min) & (lons <= lon_max)
+
+def within_radius_mask(lat: float, lon: float, lats, lons, radius_km: float) -> np.ndarray:
+    """
+    True where a point is within radius_km. The bounding box is checked first;
+    exact haversine only runs on the points inside it.
+    """
+    lats, lons = _as_float_array(lats), _as_float_array(lons)
+    mask = np.zeros(lats.shape, dtype=bool)
+    if lat is None or lon is None:
+        return mask
+    candidates = np.flatnonzero(bbox_mask(lat, lon, lats, lons, radius_km))
+    if len(candidates):
+        mask[candidates] = distances_km(lat, lon, lats[candidates], lons[candidates]) <= float(radius_km)
+    return mask
+
+# ---------------------------
+# Scalar API
+# ---------------------------
 def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Haversine formula to compute distance in kilometers between two lat/lon points.
     """
     if None in (lat1, lon1, lat2, lon2):
         return float("inf")
-    rlat1, rlon1 = math.radians(lat1), math.radians(lon1)
-    rlat2, rlon2 = math.radians(lat2), math.radians(lon2)
-    dlat = rlat2 - rlat1
-    dlon = rlon2 - rlon1
-    a = math.sin(dlat/2)**2 + math.cos(rlat1) * math.cos(rlat2) * math.sin(dlon/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    return EARTH_RADIUS_KM * c
+    return float(distances_km(lat1, lon1, [lat2], [lon2])[0])
 
 def is_within_radius(lat1: float, lon1: float, lat2: float, lon2: float, radius_km: float) -> bool:
     """
     Return True if distance <= radius_km.
     """
     return distance_km(lat1, lon1, lat2, lon2) <= float(radius_km)
-
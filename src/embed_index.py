@@ -1,64 +1,358 @@
 import os
 import json
+import time
+import queue
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import chromadb
-import chromadb.errors 
+import chromadb.errors
+import numpy as np
 from pathlib import Path
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
-from config import CHROMA_DIR, EMBEDDING_MODEL, DOCS_JSONL
+from config import (
+    CHROMA_DIR, EMBEDDING_MODEL, DOCS_JSONL,
+    EMBEDDING_STORE_ENABLED, EMBEDDING_STORE_DIR, EMBEDDING_STORE_DTYPE,
+    EMBED_WORKERS, EMBED_BATCH_CHARS, EMBED_MAX_BATCH, INDEX_READ_CHUNK, INDEX_WRITE_BATCH,
+)
+from embedding_store import EmbeddingStore
 
-def embed_and_index():
+PAGE_SIZE = 5000  # ids per get()/delete() call when diffing against the index
+QUEUE_DEPTH = 2   # chunks buffered between stages (bounds memory, gives backpressure)
+
+def load_model():
     print(f"🖥️  Running on CPU. Loading model: {EMBEDDING_MODEL}...")
     # device='cpu' ensures no GPU memory allocation attempts
-    model = SentenceTransformer(EMBEDDING_MODEL, device='cpu')
+    return SentenceTransformer(EMBEDDING_MODEL, device='cpu')
 
-    print(f"📂 Initializing ChromaDB at {CHROMA_DIR}...")
-    client = chromadb.PersistentClient(path=str(CHROMA_DIR))
-    
-    # Reset Collection
+# ---------------------------
+# Encoding
+# ---------------------------
+def length_batches(texts, max_chars=EMBED_BATCH_CHARS, max_batch=EMBED_MAX_BATCH):
+    """
+    Positions of `texts` grouped into batches of similar length (shortest
+    first), each holding at most max_chars characters / max_batch texts.
+    Short texts get big batches, long ones small, so padding stays low.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    batches, current, chars = [], [], 0
+    for i in order:
+        n = len(texts[i])
+        if current and (chars + n > max_chars or len(current) >= max_batch):
+            batches.append(current)
+            current, chars = [], 0
+        current.append(i)
+        chars += n
+    if current:
+        batches.append(current)
+    return batches
+
+_worker_model = None
+
+def _init_worker(model_name, threads):
+    global _worker_model
     try:
-        client.delete_collection("listings")
-    except:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
         pass
+    _worker_model = SentenceTransformer(model_name, device='cpu')
 
-    # Create collection with Cosine Similarity
-    coll = client.create_collection(name="listings", metadata={"hnsw:space": "cosine"})
+def _encode_batch(texts):
+    return np.asarray(_worker_model.encode(texts, batch_size=len(texts), normalize_embeddings=True), dtype=np.float32)
 
-    print("📖 Reading documents...")
-    ids, texts, metadatas = [], [], []
-    
-    if not os.path.exists(DOCS_JSONL):
-        print(f"❌ Error: {DOCS_JSONL} not found. Run ingest.py first.")
-        return
+class Encoder:
+    """
+    Normalized document embeddings, served from the EmbeddingStore when the
+    same text was encoded before. Misses are encoded in length-sorted batches,
+    across EMBED_WORKERS processes when > 1. The model (or worker pool) is only
+    started on the first miss.
+    """
+
+    def __init__(self, workers: int = EMBED_WORKERS):
+        self.workers = max(1, workers)
+        self.model = None
+        self.pool = None
+        self.store = EmbeddingStore(EMBEDDING_STORE_DIR, EMBEDDING_MODEL, EMBEDDING_STORE_DTYPE) if EMBEDDING_STORE_ENABLED else None
+        if self.store is not None:
+            print(f"📦 Embedding store: {len(self.store)} cached vectors in {self.store.dir}")
+
+    def _encode(self, texts):
+        positions = length_batches(texts)
+        batches = [[texts[i] for i in b] for b in positions]
+        if self.workers > 1:
+            if self.pool is None:
+                print(f"🖥️  Starting {self.workers} encoder processes for {EMBEDDING_MODEL}...")
+                threads = max(1, (os.cpu_count() or 1) // self.workers)
+                self.pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker, initargs=(EMBEDDING_MODEL, threads),
+                )
+            encoded = list(self.pool.map(_encode_batch, batches))
+        else:
+            if self.model is None:
+                self.model = load_model()
+            # Normalize embeddings for Cosine Similarity
+            encoded = [self.model.encode(b, batch_size=len(b), normalize_embeddings=True) for b in batches]
 
+        out = None
+        for idx, vecs in zip(positions, encoded):
+            vecs = np.asarray(vecs, dtype=np.float32)
+            if out is None:
+                out = np.zeros((len(texts), vecs.shape[1]), dtype=np.float32)
+            out[idx] = vecs
+        return out
+
+    def encode(self, texts):
+        if self.store is None:
+            return self._encode(texts)
+        return self.store.get_or_encode(texts, self._encode)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def report(self):
+        if self.store is not None:
+            stats = self.store.stats()
+            print(f"📦 Embedding store: {stats['hits']} hits, {stats['misses']} encoded ({stats['size']} cached)")
+
+# ---------------------------
+# Pipeline: reader -> encoder -> writer
+# ---------------------------
+class Stage:
+    """Busy time of one pipeline stage (time spent working, not waiting on queues)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.busy = 0.0
+        self.items = 0
+
+    def timed(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.busy += time.perf_counter() - start
+
+_DONE = object()
+
+def _read_chunks(keep, seen):
+    """Yields ([ids], [texts], [metadatas]) chunks of DOCS_JSONL, filtered by keep(id, metadata)."""
+    ids, texts, metadatas = [], [], []
     with open(DOCS_JSONL, "r", encoding="utf8") as f:
         for line in f:
             doc = json.loads(line)
-            ids.append(str(doc["id"])) # Ensure ID is string
+            doc_id = str(doc["id"]) # Ensure ID is string
+            seen.add(doc_id)
+            if not keep(doc_id, doc["metadata"]):
+                continue
+            ids.append(doc_id)
             texts.append(doc["text"])
             metadatas.append(doc["metadata"])
+            if len(ids) >= INDEX_READ_CHUNK:
+                yield ids, texts, metadatas
+                ids, texts, metadatas = [], [], []
+    if ids:
+        yield ids, texts, metadatas
+
+def run_pipeline(coll, encoder, keep, write="add", max_batch=None):
+    """
+    Streams DOCS_JSONL through three concurrent stages connected by bounded
+    queues: a reader thread, the encoder (store lookup + batched encode) and a
+    writer thread doing large coll.add / coll.upsert calls. Returns
+    (ids seen in DOCS_JSONL, documents written, per-stage stats, wall seconds).
+    """
+    write_fn = coll.add if write == "add" else coll.upsert
+    write_batch = min(INDEX_WRITE_BATCH, max_batch or INDEX_WRITE_BATCH)
+    stages = {name: Stage(name) for name in ("read", "encode", "write")}
+    to_encode, to_write = queue.Queue(QUEUE_DEPTH), queue.Queue(QUEUE_DEPTH)
+    seen, errors = set(), []
+    stop = threading.Event()  # set on any failure so the reader quits early
+
+    def reader():
+        try:
+            chunks = _read_chunks(keep, seen)
+            while not stop.is_set():
+                chunk = stages["read"].timed(next, chunks, None)
+                if chunk is None:
+                    break
+                stages["read"].items += len(chunk[0])
+                to_encode.put(chunk)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            to_encode.put(_DONE)
+
+    def writer():
+        progress = tqdm(desc="Indexing", unit="doc")
+        try:
+            while True:
+                item = to_write.get()
+                if item is _DONE:
+                    return
+                ids, texts, metadatas, embeddings = item
+                for i in range(0, len(ids), write_batch):
+                    stages["write"].timed(
+                        write_fn,
+                        ids=ids[i : i + write_batch],
+                        documents=texts[i : i + write_batch],
+                        embeddings=embeddings[i : i + write_batch].tolist(),
+                        metadatas=metadatas[i : i + write_batch],
+                    )
+                stages["write"].items += len(ids)
+                progress.update(len(ids))
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+            # Keep draining so the encoder never blocks on a full queue
+            while to_write.get() is not _DONE:
+                pass
+        finally:
+            progress.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=reader, name="index-reader"), threading.Thread(target=writer, name="index-writer")]
+    for t in threads:
+        t.start()
+    reader_done = False
+    try:
+        while True:
+            chunk = to_encode.get()
+            if chunk is _DONE:
+                reader_done = True
+                break
+            if errors:
+                continue  # drain the reader after a failure
+            ids, texts, metadatas = chunk
+            embeddings = stages["encode"].timed(encoder.encode, texts)
+            stages["encode"].items += len(ids)
+            to_write.put((ids, texts, metadatas, embeddings))
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        to_write.put(_DONE)
+        # The reader may be blocked on a full queue: drain it until it signs off
+        while not reader_done:
+            reader_done = to_encode.get() is _DONE
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+    return seen, stages["write"].items, stages, time.perf_counter() - start
+
+def report_pipeline(written, stages, wall):
+    rate = written / wall if wall > 0 else 0.0
+    print(f"⏱️  {written} documents in {wall:.1f}s ({rate:.1f} docs/sec)")
+    for stage in stages.values():
+        share = stage.busy / wall if wall > 0 else 0.0
+        print(f"   - {stage.name:<6} busy {stage.busy:7.2f}s ({share:6.1%} of wall time), {stage.items} docs")
+
+# ---------------------------
+# Full / delta indexing
+# ---------------------------
+def indexed_hashes(coll):
+    """
+    {id: content_hash} for everything in the collection (None for documents
+    indexed before content hashes existed).
+    """
+    hashes = {}
+    offset = 0
+    while True:
+        page = coll.get(include=["metadatas"], limit=PAGE_SIZE, offset=offset)
+        for doc_id, meta in zip(page["ids"], page["metadatas"]):
+            hashes[doc_id] = (meta or {}).get("content_hash")
+        if len(page["ids"]) < PAGE_SIZE:
+            return hashes
+        offset += PAGE_SIZE
+
+def bump_index_version(coll):
+    # hnsw:* keys can't be passed to modify(); the distance function is kept as-is
+    meta = {k: v for k, v in (coll.metadata or {}).items() if not k.startswith("hnsw:")}
+    meta["index_version"] = str(time.time_ns())  # collection id is unchanged, so this must differ
+    coll.modify(metadata=meta)
+
+def embed_and_index(delta: bool = False):
+    if not os.path.exists(DOCS_JSONL):
+        print(f"❌ Error: {DOCS_JSONL} not found. Run ingest.py first.")
+        return
+
+    print(f"📂 Initializing ChromaDB at {CHROMA_DIR}...")
+    client = chromadb.PersistentClient(path=str(CHROMA_DIR))
 
-    print(f"   - Found {len(ids)} documents.")
-    
-    batch_size = 32 
+    if delta:
+        try:
+            coll = client.get_collection("listings")
+        except Exception:
+            print("⚠️ No existing collection, falling back to a full reindex.")
+            coll = None
+        if coll is not None:
+            embed_delta(client, coll)
+            return
+
+    # Reset Collection
+    try:
+        client.delete_collection("listings")
+    except:
+        pass
+
+    # Create collection with Cosine Similarity.
+    # index_version lets the API invalidate answers cached against an older index.
+    coll = client.create_collection(
+        name="listings",
+        metadata={"hnsw:space": "cosine", "index_version": str(int(time.time()))}
+    )
+
+    encoder = Encoder()
     print("🚀 Starting embedding process...")
-    
-    for i in tqdm(range(0, len(ids), batch_size), desc="Processing"):
-        batch_ids = ids[i : i + batch_size]
-        batch_texts = texts[i : i + batch_size]
-        batch_meta = metadatas[i : i + batch_size]
-
-        # Normalize embeddings for Cosine Similarity
-        embeddings = model.encode(batch_texts, normalize_embeddings=True)
-
-        coll.add(
-            ids=batch_ids,
-            documents=batch_texts,
-            embeddings=embeddings.tolist(),
-            metadatas=batch_meta
+    try:
+        _, written, stages, wall = run_pipeline(
+            coll, encoder, lambda doc_id, meta: True, max_batch=client.get_max_batch_size()
         )
+    finally:
+        encoder.close()
+    encoder.report()
+    report_pipeline(written, stages, wall)
 
     print(f"✅ Success! Indexed {coll.count()} documents.")
 
+def embed_delta(client, coll):
+    """
+    Embeds and upserts only new or changed documents (by content_hash) and
+    deletes documents that are no longer in DOCS_JSONL.
+    """
+    existing = indexed_hashes(coll)
+
+    def changed(doc_id, meta):
+        return existing.get(doc_id) is None or existing[doc_id] != meta.get("content_hash")
+
+    encoder = Encoder()
+    print("🚀 Embedding new/changed documents...")
+    try:
+        seen, written, stages, wall = run_pipeline(
+            coll, encoder, changed, write="upsert", max_batch=client.get_max_batch_size()
+        )
+    finally:
+        encoder.close()
+    removed = [doc_id for doc_id in existing if doc_id not in seen]
+    print(f"🔎 Delta: {written} new/changed, {len(removed)} removed, {len(seen) - written} unchanged")
+    encoder.report()
+    report_pipeline(written, stages, wall)
+
+    for i in range(0, len(removed), PAGE_SIZE):
+        coll.delete(ids=removed[i : i + PAGE_SIZE])
+
+    if written or removed:
+        bump_index_version(coll)
+    print(f"✅ Success! Index holds {coll.count()} documents.")
+
 if __name__ == "__main__":
-    embed_and_index()
+    parser = argparse.ArgumentParser(description="Embed DOCS_JSONL into the listings collection.")
+    parser.add_argument("--delta", action="store_true",
+                        help="only embed new/changed documents and delete removed ones")
+    args = parser.parse_args()
+    embed_and_index(delta=args.delta)
@@ -0,0 +1,107 @@
+# embedding_cache.py
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Bounded, thread-safe LRU cache for query embeddings.
+
+    Keys are normalized query text (lowercased, whitespace collapsed). The BGE
+    tokenizer is uncased, so this normalization does not change the vector.
+    Optionally persisted to an .npz file so the cache survives restarts.
+    """
+
+    def __init__(self, max_size: int = 2048, path: Optional[str] = None, model_name: str = ""):
+        self.max_size = max_size
+        self.path = path
+        self.model_name = model_name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(str(text).lower().split())
+
+    def get(self, text: str):
+        key = self.normalize(text)
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, text: str, vec) -> None:
+        key = self.normalize(text)
+        vec = np.asarray(vec, dtype=np.float32)
+        with self._lock:
+            self._data[key] = vec
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, text: str, compute: Callable[[str], "np.ndarray"]):
+        """
+        Returns the cached vector for `text`, computing (outside the lock) on a miss.
+        """
+        vec = self.get(text)
+        if vec is None:
+            vec = np.asarray(compute(text), dtype=np.float32)
+            self.put(text, vec)
+        return vec
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            keys = list(self._data.keys())
+            vecs = np.stack(list(self._data.values())) if keys else np.zeros((0, 0), dtype=np.float32)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, keys=np.array(keys, dtype=object), vecs=vecs, model=np.array(self.model_name))
+        os.replace(tmp, path)
+        print(f"💾 Saved {len(keys)} query embeddings to {path}")
+
+    def load(self, path: Optional[str] = None) -> int:
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            data = np.load(path, allow_pickle=True)
+            if str(data["model"]) != self.model_name:
+                print(f"⚠️ Embedding cache at {path} was built with {data['model']}, ignoring it.")
+                return 0
+            keys, vecs = data["keys"], data["vecs"]
+        except Exception as e:
+            print(f"⚠️ Could not load embedding cache: {e}")
+            return 0
+
+        # Oldest entries first so the LRU order is preserved
+        for key, vec in zip(keys[-self.max_size:], vecs[-self.max_size:]):
+            self.put(str(key), vec)
+        print(f"📂 Loaded {len(self._data)} query embeddings from {path}")
+        return len(self._data)
@@ -0,0 +1,153 @@
+# embedding_store.py
+import hashlib
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    On-disk, content-addressed document embeddings, keyed by (model, text hash).
+
+    Each model gets its own directory under `root`, so changing EMBEDDING_MODEL
+    starts an empty namespace instead of mixing vectors. Inside it:
+        vectors.bin   raw float32/float16 rows, append-only, read through np.memmap
+        index.tsv     "<sha1 of text>\\t<row>" lines, append-only
+        meta.json     model name, dim, dtype
+    Rows are written before their index lines, so a crash mid-write leaves at
+    most unindexed bytes at the end of vectors.bin, which are ignored.
+    """
+
+    def __init__(self, root: str, model_name: str, dtype: str = "float32"):
+        self.model_name = model_name
+        self.dir = os.path.join(root, self.namespace(model_name))
+        self.vectors_path = os.path.join(self.dir, "vectors.bin")
+        self.index_path = os.path.join(self.dir, "index.tsv")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.dtype = np.dtype(dtype)
+        self.dim = None
+        self.index: Dict[str, int] = {}
+        self._vectors = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def namespace(model_name: str) -> str:
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+        return f"{slug}-{hashlib.sha1(model_name.encode('utf8')).hexdigest()[:8]}"
+
+    def _load(self) -> None:
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path, encoding="utf8") as f:
+            meta = json.load(f)
+        # An existing namespace keeps the dtype it was created with
+        self.dtype = np.dtype(meta["dtype"])
+        self.dim = int(meta["dim"])
+        stored_rows = os.path.getsize(self.vectors_path) // self.row_bytes if os.path.exists(self.vectors_path) else 0
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, encoding="utf8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 2 and parts[1].isdigit() and int(parts[1]) < stored_rows:
+                    self.index[parts[0]] = int(parts[1])
+
+    @property
+    def row_bytes(self) -> int:
+        return self.dim * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def vectors(self) -> np.ndarray:
+        """Memory-mapped (rows x dim) view of every stored vector."""
+        if self._vectors is None and self.dim is not None and os.path.exists(self.vectors_path):
+            rows = os.path.getsize(self.vectors_path) // self.row_bytes
+            if rows:
+                self._vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+        return self._vectors
+
+    # ---------------------------
+    # Lookup / insert
+    # ---------------------------
+    def get_many(self, texts: List[str]) -> Tuple[Optional[np.ndarray], List[int]]:
+        """
+        (float32 matrix with cached rows filled in, positions of the misses).
+        The matrix is None when the store is still empty.
+        """
+        keys = [text_key(t) for t in texts]
+        rows = [self.index.get(k) for k in keys]
+        missing = [i for i, r in enumerate(rows) if r is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if self.dim is None:
+            return None, missing
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        found = [i for i, r in enumerate(rows) if r is not None]
+        if found:
+            out[found] = self.vectors()[[rows[i] for i in found]]
+        return out, missing
+
+    def put_many(self, texts: List[str], vecs) -> None:
+        vecs = np.asarray(vecs)
+        if self.dim is None:
+            self.dim = int(vecs.shape[1])
+            os.makedirs(self.dir, exist_ok=True)
+            with open(self.meta_path, "w", encoding="utf8") as f:
+                json.dump({"model": self.model_name, "dim": self.dim, "dtype": self.dtype.name}, f)
+        new = {}
+        for text, vec in zip(texts, vecs):
+            key = text_key(text)
+            if key not in self.index and key not in new:
+                new[key] = vec
+        if not new:
+            return
+
+        start = os.path.getsize(self.vectors_path) // self.row_bytes if os.path.exists(self.vectors_path) else 0
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(start * self.row_bytes)  # drop any partial row left by a crash
+            f.write(np.ascontiguousarray(np.stack(list(new.values())), dtype=self.dtype).tobytes())
+        with open(self.index_path, "a", encoding="utf8") as f:
+            for offset, key in enumerate(new):
+                f.write(f"{key}\t{start + offset}\n")
+                self.index[key] = start + offset
+        self._vectors = None  # remap on next read
+
+    def get_or_encode(self, texts: List[str], encode: Callable[[List[str]], "np.ndarray"]) -> np.ndarray:
+        """
+        Vectors for `texts`; only cache misses go through `encode`.
+        """
+        out, missing = self.get_many(texts)
+        if not missing:
+            return out
+        unique = list(dict.fromkeys(texts[i] for i in missing))
+        encoded = np.asarray(encode(unique), dtype=np.float32)
+        self.put_many(unique, encoded)
+        if out is None:
+            out = np.zeros((len(texts), encoded.shape[1]), dtype=np.float32)
+        # float16 stores hand back the rounded vector, same as a later cache hit would
+        stored = encoded.astype(self.dtype).astype(np.float32)
+        pos = {t: j for j, t in enumerate(unique)}
+        for i in missing:
+            out[i] = stored[pos[texts[i]]]
+        return out
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "size": len(self.index),
+            "dtype": self.dtype.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
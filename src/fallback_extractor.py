@@ -20,114 +20,202 @@ WORD_TO_NUM = {
     "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6
 }
 
-def parse_budget(text: str) -> Optional[int]:
-    if not text: return None
-    s = text.lower().replace(",", "") # Remove commas immediately
-    
+# Words that mean the query leans on earlier turns ("cheaper ones", "same area")
+HISTORY_CUES = re.compile(
+    r"\b(it|its|that|those|these|them|they|same|similar|previous|earlier|above|"
+    r"last|cheaper|bigger|smaller|larger|more|other|another|instead|again|also)\b"
+)
+# Signals that a field was mentioned even if the regex parser could not read it
+BHK_CUES = re.compile(r"\b(bhk|bed|beds|bedroom|bedrooms|rk|studio|room|rooms)\b|\dbhk")
+BUDGET_CUES = re.compile(
+    r"\b(under|below|within|budget|upto|up to|max|maximum|less than|price|cost|"
+    r"cr|crore|crores|lakh|lakhs|lac|lacs|rs|inr|million)\b|₹"
+)
+LOCATION_CUES = re.compile(r"\b(?:in|near|at|around|close to)\s+([a-z][a-z]+)")
+# "in <word>" that is not a place
+NON_LOCATION_WORDS = {
+    "bangalore", "bengaluru", "the", "a", "an", "my", "budget", "range", "good", "prime",
+    "south", "north", "east", "west", "central", "city", "area", "areas", "zone", "gated",
+    "ready", "under", "below", "around", "total", "sqft", "lakh", "lakhs", "cr", "crore"
+}
+
+# ---------------------------
+# Compiled patterns (built once at import)
+# ---------------------------
+# "one" is replaced before "two" in the original sequential str.replace
+# passes, so "twone" -> "tw1"; the lookahead keeps that in a single pass.
+NUMBER_WORDS_RE = re.compile(r"one|two(?!ne)|three|four|five|six")
+BUDGET_UNIT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(crores|crore|cr|lakhs|lakh|lacs|lac|l|k)\b')
+LARGE_NUMBER_RE = re.compile(r'\b(\d{6,})\b')
+BHK_RANGE_RE = re.compile(r'(\d+)\s*(?:-|to)\s*(\d+)\s*(?:bhk|bed)')
+SINGLE_DIGIT_RE = re.compile(r'\b(\d)\b')
+ATTACHED_BHK_RE = re.compile(r'(\d)bhk')
+# A lone digit written against "bhk"/"bed": "3 bhk", "2-3 bhk", "2, 3 or 4 bhk"
+# (not the "5" of "2.5 bhk" or the "3" of "13 bhk")
+EXPLICIT_BHK_RANGE_RE = re.compile(r'(?<![\w.])(\d)\s*(?:-|to)\s*(\d)\s*(?:bhk|bed)')
+EXPLICIT_BHK_LIST_RE = re.compile(r'(?<![\w.])(\d(?:\s*(?:,|/|or|and)\s*\d)+)\s*(?:bhk|bed)')
+EXPLICIT_BHK_RE = re.compile(r'(?<![\w.])(\d)\s*(?:bhk|bed)')
+
+# One alternation over the whole gazetteer. The lookahead reports, at every
+# position, the first locality in SORTED_LOCALITIES order that matches there;
+# the lowest rank over all positions is what the old per-locality loop found.
+LOCALITY_RANK = {loc: i for i, loc in enumerate(SORTED_LOCALITIES)}
+LOCALITY_RE = re.compile(
+    r"\b(?=(" + "|".join(re.escape(loc) for loc in SORTED_LOCALITIES) + r")\b)"
+) if SORTED_LOCALITIES else None
+
+def _number_words_to_digits(s: str) -> str:
+    return NUMBER_WORDS_RE.sub(lambda m: str(WORD_TO_NUM[m.group(0)]), s)
+
+# ---------------------------
+# Parsers (on lowercased text)
+# ---------------------------
+def _parse_budget(s: str) -> Optional[int]:
+    s = s.replace(",", "") # Remove commas immediately
+
     # 1. Explicit matches (Number + Unit) - e.g., "1.5 cr", "80 lakhs"
-    # We look for specific units to avoid confusion with sqft/bhk
-    m = re.search(r'(\d+(?:\.\d+)?)\s*(cr|crore|lakh|lac|l|k)\b', s)
-    
+    m = BUDGET_UNIT_RE.search(s)
     if m:
         val = float(m.group(1))
         unit = m.group(2)
-        # Normalize unit strings
         if unit.startswith("cr"): mul = 10000000
         elif unit.startswith("l"): mul = 100000
         elif unit == "k": mul = 1000
         else: mul = 1
         return int(val * mul)
 
-    # 2. Implicit Context (e.g., "budget 5000000")
-    # Only look for raw large numbers if 'budget' or 'price' is mentioned nearby
-    # or if the number is very large (> 5 Lakhs)
-    large_nums = re.findall(r'\b(\d{6,})\b', s)
-    if large_nums:
-        return int(large_nums[0]) # Return the first large number found
-        
+    # 2. Implicit: first raw large number (> 5 Lakhs)
+    m = LARGE_NUMBER_RE.search(s)
+    if m:
+        return int(m.group(1))
     return None
 
-def parse_bhk(text: str) -> Optional[List[int]]:
-    if not text: return None
-    s = text.lower()
-    
+def _explicit_bhk(s: str) -> set:
+    """BHK counts written explicitly against "bhk"/"bed" (on digit-converted text)."""
+    explicit = set()
+    for a, b in EXPLICIT_BHK_RANGE_RE.findall(s):
+        explicit.update(range(int(a), int(b) + 1))
+    for digits in EXPLICIT_BHK_LIST_RE.findall(s):
+        explicit.update(int(c) for c in re.findall(r'\d', digits))
+    explicit.update(int(x) for x in EXPLICIT_BHK_RE.findall(s))
+    return explicit
+
+def _parse_bhk(s: str) -> Optional[List[int]]:
     # Convert words to numbers (e.g. "three bhk" -> "3 bhk")
-    for word, num in WORD_TO_NUM.items():
-        s = s.replace(word, str(num))
+    s = _number_words_to_digits(s)
+
+    # 0. Explicit "3 bhk" / "2-3 bhk" forms win, so loose digits elsewhere
+    #    (the "1" in "under 1.2 cr") do not leak into the list
+    explicit = _explicit_bhk(s)
+    if explicit:
+        return sorted(explicit)
 
     bhks = set()
 
-    # 1. Handle "2.5 BHK" specific case
+    # 1. "2.5 BHK" is treated as 3
     if "2.5" in s:
-        # usually mapped to 3 in search or kept as special case. 
-        # For this logic, we might treat it as 3 or keep 2. 
-        # Let's append 2 and 3 to be safe, or just 3.
-        bhks.add(3) 
+        bhks.add(3)
 
-    # 2. Ranges: "2 to 3 BHK", "2-3 BHK"
-    m_range = re.search(r'(\d+)\s*(?:-|to)\s*(\d+)\s*(?:bhk|bed)', s)
+    # 2. Ranges: "2 to 3 BHK", "2-3 BHK" (both ends < 10, so "1200 sqft" is not a range end)
+    m_range = BHK_RANGE_RE.search(s)
     if m_range:
         start = int(m_range.group(1))
         end = int(m_range.group(2))
-        # Safety cap to prevent "1200 sqft" acting as range end
         if start < 10 and end < 10:
             return list(range(start, end + 1))
 
-    # 3. Multiple choices: "2, 3 BHK", "2 or 3 BHK"
-    # Find all digits immediately preceding "bhk" or "bedroom"
-    # This regex looks for patterns like "2, 3, 4 BHK"
-    # It creates a temporary string focusing on the area around the keyword
+    # 3. Multiple choices: "2, 3 BHK", "2 or 3 BHK" -> single digits anywhere in the text
     if "bhk" in s or "bed" in s:
-        # Extract simple integers < 10 to avoid capturing sqft or budget
-        candidates = re.findall(r'\b(\d)\b', s)
-        for c in candidates:
-            bhks.add(int(c))
+        bhks.update(int(c) for c in SINGLE_DIGIT_RE.findall(s))
 
-    # If specific "BHK" token exists, prioritize numbers attached to it
-    # e.g. "3BHK"
-    attached = re.findall(r'(\d)bhk', s)
-    for a in attached:
-        bhks.add(int(a))
+    # Digits attached to "bhk", e.g. "3BHK"
+    bhks.update(int(a) for a in ATTACHED_BHK_RE.findall(s))
 
     if not bhks:
         if "studio" in s:
             return [1]
         return None
+    return sorted(bhks)
 
-    return sorted(list(bhks))
+def _parse_locality(s: str):
+    if LOCALITY_RE is None:
+        return None, None
+    best = None
+    for m in LOCALITY_RE.finditer(s):
+        loc = m.group(1)
+        if best is None or LOCALITY_RANK[loc] < LOCALITY_RANK[best]:
+            best = loc
+            if LOCALITY_RANK[loc] == 0:
+                break
+    if best is None:
+        return None, None
+    return best.title(), LOCALITY_TO_ZONE[best]
+
+def parse_budget(text: str) -> Optional[int]:
+    if not text: return None
+    return _parse_budget(text.lower())
+
+def parse_bhk(text: str) -> Optional[List[int]]:
+    if not text: return None
+    return _parse_bhk(text.lower())
 
 def parse_locality_and_zone(text: str):
     """
-    Scans the text for known localities from our database.
+    Scans the text for known localities from our database (longest name wins).
     Returns (locality, zone)
     """
     if not text: return None, None
-    s = text.lower()
-    
-    # Remove common noise words to prevent false partial matches if any
-    # (Optional, but 'whitefield' match is usually safe)
-    
-    # Iterate through our SORTED keys (Longest first)
-    # This comes from locality_map.py
-    for loc in SORTED_LOCALITIES:
-        # Check if the known locality is in the query string
-        # Use \b for word boundary to avoid matching 'male' in 'maleshwaram'
-        if re.search(r'\b' + re.escape(loc) + r'\b', s):
-            return loc.title(), LOCALITY_TO_ZONE[loc]
-            
-    return None, None
+    return _parse_locality(text.lower())
 
 def extract_all(text: str):
     """
     Returns dict: {"bhk": [..], "budget_max": int, "locality": str, "zone": str}
     """
-    bhk = parse_bhk(text)
-    budget = parse_budget(text)
-    loc, zone = parse_locality_and_zone(text)
-    
+    if not text:
+        return {"bhk": None, "budget_max": None, "locality": None, "zone": None}
+    s = text.lower()
+    loc, zone = _parse_locality(s)
     return {
-        "bhk": bhk,
-        "budget_max": budget,
+        "bhk": _parse_bhk(s),
+        "budget_max": _parse_budget(s),
         "locality": loc,
         "zone": zone
     }
+
+def _bhk_confidence(s: str, bhk) -> float:
+    if not bhk:
+        return 0.0 if BHK_CUES.search(s) else 1.0
+    # Explicit "3 bhk" / "2-3 bhk" forms are unambiguous; loose digits
+    # (e.g. "2.5 bhk" or a bare "bhk" next to numbers) are not.
+    return 1.0 if _explicit_bhk(_number_words_to_digits(s)) else 0.5
+
+def _budget_confidence(s: str, budget) -> float:
+    s = s.replace(",", "")
+    if budget:
+        return 1.0 if BUDGET_UNIT_RE.search(s) else 0.6
+    return 0.0 if BUDGET_CUES.search(s) else 1.0
+
+def _locality_confidence(s: str, locality) -> float:
+    if locality:
+        return 1.0
+    for word in LOCATION_CUES.findall(s):
+        if word not in NON_LOCATION_WORDS:
+            return 0.0
+    return 1.0
+
+def extract_with_confidence(text: str):
+    """
+    Same fields as extract_all, plus:
+      "confidence": per-field score in [0, 1]. 1.0 means parsed from an explicit
+                    pattern, or clearly not mentioned at all.
+      "refers_to_history": True if the query leans on earlier turns.
+    """
+    data = extract_all(text)
+    s = (text or "").lower()
+    data["confidence"] = {
+        "bhk": _bhk_confidence(s, data["bhk"]),
+        "budget_max": _budget_confidence(s, data["budget_max"]),
+        "locality": _locality_confidence(s, data["locality"])
+    }
+    data["refers_to_history"] = bool(HISTORY_CUES.search(s))
+    return data
@@ -1,19 +1,46 @@
 import json
-from config import GROQ_MODEL
-from fallback_extractor import extract_all as fallback_extract, parse_budget
+from collections import Counter
+from config import GROQ_MODEL, FAST_PATH_ENABLED, FAST_PATH_MIN_CONFIDENCE
+from fallback_extractor import extract_with_confidence, parse_budget
 from locality_map import infer_zone_from_locality
+from llm_cache import chat_completion, chat_completion_async
 
-def extract_filters_llm(client, query_text: str, history_str: str = ""):
+FIELDS = ("bhk", "budget_max", "locality", "zone")
+
+# How often each extraction path fires: fast_path / llm / llm_error / no_client
+EXTRACTION_STATS = Counter()
+
+def _use_fast_path(parsed, history_str: str) -> bool:
     """
-    Extracts filters using Groq (Llama-3).
+    True when the regex parser fully and unambiguously understood the query,
+    so a Groq round trip cannot add anything.
     """
-    # 1. Fallback first
-    fallback_data = fallback_extract(query_text)
+    if not FAST_PATH_ENABLED or parsed["refers_to_history"]:
+        return False
+    if min(parsed["confidence"].values()) < FAST_PATH_MIN_CONFIDENCE:
+        return False
+    # A filter-less follow-up ("what about villas?") may still depend on history
+    found = any(parsed[k] for k in ("bhk", "budget_max", "locality"))
+    return found or not history_str.strip()
+
+def _fallback_first(client, query_text: str, history_str: str):
+    """
+    Returns (fallback_data, done). done=True means skip the LLM call.
+    """
+    parsed = extract_with_confidence(query_text)
+    fallback_data = {k: parsed[k] for k in FIELDS}
+    fallback_data["refers_to_history"] = parsed["refers_to_history"]
 
     if not client:
-        return fallback_data
+        EXTRACTION_STATS["no_client"] += 1
+        return fallback_data, True
+    if _use_fast_path(parsed, history_str):
+        EXTRACTION_STATS["fast_path"] += 1
+        print(f"⚡ Fast path: regex parser fully resolved '{query_text}', skipping Groq")
+        return fallback_data, True
+    return fallback_data, False
 
-    # 2. Prompt
+def _build_messages(query_text: str, history_str: str = ""):
     system_msg = """
     You are a real estate query parser. 
     Extract search filters from the User Query and Conversation History into a JSON object.
@@ -32,47 +59,94 @@ def extract_filters_llm(client, query_text: str, history_str: str = ""):
     
     User Query: "{query_text}"
     """
+    return [
+        {"role": "system", "content": system_msg},
+        {"role": "user", "content": user_msg}
+    ]
+
+def _parse_filters(text: str) -> dict:
+    """The LLM's JSON reply; raises on anything but a JSON object (so it is not cached)."""
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+    return data
+
+def _merge(llm_data, fallback_data):
+    final_locality = llm_data.get("locality") or fallback_data.get("locality")
+    if final_locality and final_locality.lower() in ["bangalore", "bengaluru", "location"]:
+        final_locality = None
+
+    final_zone = None
+    if final_locality:
+        final_zone = infer_zone_from_locality(final_locality)
+
+    llm_budget_raw = llm_data.get("budget_max")
+    if llm_budget_raw:
+        final_budget = parse_budget(str(llm_budget_raw))
+    else:
+        final_budget = fallback_data.get("budget_max")
+
+    final_bhk = llm_data.get("bhk") or fallback_data.get("bhk")
+
+    return {
+        "bhk": final_bhk,
+        "budget_max": final_budget,
+        "locality": final_locality,
+        "zone": final_zone,
+        "refers_to_history": fallback_data.get("refers_to_history", False)
+    }
+
+def extract_filters_llm(client, query_text: str, history_str: str = ""):
+    """
+    Extracts filters using Groq (Llama-3).
+    """
+    # 1. Fallback first (and fast path when it is confident)
+    fallback_data, done = _fallback_first(client, query_text, history_str)
+    if done:
+        return fallback_data
 
     try:
-        # GROQ CALL
-        response = client.chat.completions.create(
+        # 2. GROQ CALL (memoized: temperature=0 + identical prompt => identical output)
+        llm_data = chat_completion(
+            client,
             model=GROQ_MODEL,
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": user_msg}
-            ],
+            messages=_build_messages(query_text, history_str),
             # Llama-3 supports JSON mode
-            response_format={"type": "json_object"}, 
-            temperature=0
+            response_format={"type": "json_object"},
+            temperature=0,
+            parse=_parse_filters
+        )
+        EXTRACTION_STATS["llm"] += 1
+
+        # 3. MERGING LOGIC
+        return _merge(llm_data, fallback_data)
+
+    except Exception as e:
+        EXTRACTION_STATS["llm_error"] += 1
+        print(f"⚠️ Groq Extraction failed: {e}")
+        return fallback_data
+
+async def extract_filters_llm_async(client, query_text: str, history_str: str = ""):
+    """
+    Same as extract_filters_llm, but awaits an AsyncGroq client.
+    """
+    fallback_data, done = _fallback_first(client, query_text, history_str)
+    if done:
+        return fallback_data
+
+    try:
+        llm_data = await chat_completion_async(
+            client,
+            model=GROQ_MODEL,
+            messages=_build_messages(query_text, history_str),
+            response_format={"type": "json_object"},
+            temperature=0,
+            parse=_parse_filters
         )
-        
-        text = response.choices[0].message.content
-        llm_data = json.loads(text)
-
-        # --- 3. MERGING LOGIC (Same as before) ---
-        final_locality = llm_data.get("locality") or fallback_data.get("locality")
-        if final_locality and final_locality.lower() in ["bangalore", "bengaluru", "location"]:
-            final_locality = None
-
-        final_zone = None
-        if final_locality:
-            final_zone = infer_zone_from_locality(final_locality)
-
-        llm_budget_raw = llm_data.get("budget_max")
-        if llm_budget_raw:
-            final_budget = parse_budget(str(llm_budget_raw))
-        else:
-            final_budget = fallback_data.get("budget_max")
-
-        final_bhk = llm_data.get("bhk") or fallback_data.get("bhk")
-
-        return {
-            "bhk": final_bhk,
-            "budget_max": final_budget,
-            "locality": final_locality,
-            "zone": final_zone
-        }
+        EXTRACTION_STATS["llm"] += 1
+        return _merge(llm_data, fallback_data)
 
     except Exception as e:
+        EXTRACTION_STATS["llm_error"] += 1
         print(f"⚠️ Groq Extraction failed: {e}")
         return fallback_data
@@ -1,8 +1,14 @@
+import numpy as np
 import pandas as pd
+import hashlib
 import json
 import os
-from pathlib import Path
-from config import DATA_CSV, DOCS_JSONL
+from config import DATASET_PATH, DOCS_JSONL, KEYWORD_MATRIX_PATH, INGEST_CHUNK_SIZE
+from dataset_io import bhk_lists, iter_tables, parse_bhk_string, read_table, table_format
+from keyword_matrix import KeywordMatrix
+from ranking import keyword_text
+from locality_coords import get_coords_for_locality
+from locality_resolver import COORDS_FROM_MATCH
 
 def safe_get(row, col, default=''):
     val = row.get(col)
@@ -10,17 +16,6 @@ def safe_get(row, col, default=''):
         return default
     return val
 
-def parse_bhk_string(bhk_str):
-    """Parses '[2, 3]' string into a Python list."""
-    if pd.isna(bhk_str) or str(bhk_str) == '[]':
-        return []
-    try:
-        clean = str(bhk_str).replace('[', '').replace(']', '')
-        # Handle floats like '2.0' converting to int '2'
-        return [int(float(x.strip())) for x in clean.split(',') if x.strip()]
-    except:
-        return []
-
 def format_price(price_val):
     try:
         val = float(price_val)
@@ -30,6 +25,21 @@ def format_price(price_val):
     except:
         return "Price on Request"
 
+def listing_id(url, title) -> str:
+    """
+    Stable id derived from the listing itself (url + title), so reordering
+    or filtering the CSV does not change ids.
+    """
+    return hashlib.sha1(f"{url}|{title}".encode("utf8")).hexdigest()[:16]
+
+def content_hash(text, metadata) -> str:
+    """
+    Hash of everything that gets indexed for a document; changes whenever
+    the embedding text or any metadata field changes.
+    """
+    payload = json.dumps({"text": text, "metadata": metadata}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf8")).hexdigest()
+
 def row_to_doc(row):
     title = safe_get(row, 'title', 'Untitled Property')
     locality = safe_get(row, 'Extracted_Locality', 'Bangalore')
@@ -79,31 +89,194 @@ def row_to_doc(row):
         "area": area,
         "price_per_sqft": float(price_per_sqft),
         "bhk_list": str(bhk_list), # Stored as string "[2, 3]" for Chroma
+        "bhk_mask": sum(1 << b for b in set(bhk_list) if 0 <= b < 32), # bit n set when n BHK is offered
         "livability_score": float(liv_score),
         "investment_score": float(inv_score)
     }
+    # Coordinates resolved once here, so proximity search is a metadata filter.
+    # Weak fuzzy matches (e.g. the default "Bangalore") get none rather than a wrong pin.
+    lat, lon, _, _ = get_coords_for_locality(str(locality), COORDS_FROM_MATCH)
+    if lat is not None:
+        metadata["lat"] = float(lat)
+        metadata["lon"] = float(lon)
+
+    # One boolean flag per offered BHK so the where clause can filter on it
+    for b in sorted(set(bhk_list)):
+        metadata[f"bhk_{b}"] = True
+
+    metadata["content_hash"] = content_hash(full_text, metadata)
 
     return {
-        "id": str(row.name),
+        "id": listing_id(metadata["url"], metadata["title"]),
         "text": full_text, 
         "metadata": metadata
     }
 
-def build_docs():
-    print(f"Reading from {DATA_CSV}...")
-    df = pd.read_csv(DATA_CSV)
+# ---------------------------
+# Columnar builder
+# ---------------------------
+def _text_column(df, col, default=''):
+    """safe_get() for a whole column, as strings."""
+    if col not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    s = df[col]
+    as_str = s.astype(str)
+    missing = s.isna() | (as_str == "") | (as_str.str.lower() == "nan")
+    return as_str.where(~missing, default)
+
+def _float_column(df, col, default=0.0):
+    """float(row.get(col, default)) for a whole column (NaN stays NaN)."""
+    if col not in df.columns:
+        return pd.Series(float(default), index=df.index)
+    return pd.to_numeric(df[col], errors="coerce").astype(float)
+
+def _format_prices(prices: pd.Series) -> pd.Series:
+    """format_price() for a whole column."""
+    v = prices.to_numpy(dtype=float)
+    finite = np.isfinite(v)
+    out = np.full(len(v), "Price on Request", dtype=object)
+    cr = v >= 10000000
+    lakh = ~cr & (v >= 100000)
+    small = finite & ~cr & ~lakh
+    out[cr] = [f"{x:.2f} Cr" for x in (v[cr] / 10000000).tolist()]
+    out[lakh] = [f"{x:.2f} Lakhs" for x in (v[lakh] / 100000).tolist()]
+    out[small] = np.trunc(v[small]).astype(np.int64).astype(str)
+    return pd.Series(out, index=prices.index)
+
+def docs_from_frame(df):
+    """
+    row_to_doc() for every row of a DataFrame chunk, computed column by column.
+    Per-row work is limited to building the dicts; repeated values (BHK strings,
+    localities) are parsed/resolved once per distinct value.
+    """
+    title = _text_column(df, 'title', 'Untitled Property')
+    locality = _text_column(df, 'Extracted_Locality', 'Bangalore')
+    zone = _text_column(df, 'Zone', 'Unknown')
+    url = _text_column(df, 'url', '')
+
+    price_raw = _float_column(df, 'Exact_Price')
+    price_fmt = _format_prices(price_raw)
+    if 'Cleaned_Area' in df.columns:
+        # float() of junk is 0.0 in row_to_doc, but NaN stays NaN
+        area = pd.to_numeric(df['Cleaned_Area'], errors="coerce").astype(float)
+        area = area.where(area.notna() | df['Cleaned_Area'].isna(), 0.0)
+    else:
+        area = pd.Series(0.0, index=df.index)
+    price_per_sqft = _float_column(df, 'Price_Per_Sqft').fillna(0.0)
+
+    bhks_per_row = bhk_lists(df['BHK_List'].tolist()) if 'BHK_List' in df.columns else [[] for _ in range(len(df))]
+    bhk_text = [", ".join([str(x) for x in b]) if b else "Residential" for b in bhks_per_row]
+
+    # Python round(), not np.round, to keep the exact same values
+    liv_score = [round(x, 1) for x in _float_column(df, 'Livability_Score').tolist()]
+    inv_score = [round(x, 1) for x in _float_column(df, 'Investment_Score').tolist()]
+
+    desc = _text_column(df, 'description', '')
+    details = desc.str.split().str.join(" ")
+
+    coords = {loc: get_coords_for_locality(loc, COORDS_FROM_MATCH)[:2] for loc in locality.unique()}
+
+    columns = zip(
+        title.tolist(), locality.tolist(), zone.tolist(), url.tolist(),
+        price_raw.tolist(), price_fmt.tolist(), area.tolist(), price_per_sqft.tolist(),
+        bhks_per_row, bhk_text, liv_score, inv_score, desc.tolist(), details.tolist(),
+    )
+    for (t, loc, z, u, price, pfmt, a, ppsf, bhks, btext, liv, inv, d, det) in columns:
+        text_parts = [
+            f"Real Estate Listing: {t}.",
+            f"Located in {loc}, {z} Zone, Bangalore.",
+            f"This property offers {btext} BHK configurations.",
+            f"Priced at approximately {pfmt} for an area of {a} sqft.",
+            f"Scores: Livability {liv}/100, Investment Potential {inv}/100."
+        ]
+        if d:
+            text_parts.append(f"Details: {det}")
+        full_text = " ".join(text_parts)
+
+        metadata = {
+            "title": t,
+            "url": u,
+            "locality": loc,
+            "zone": z,
+            "exact_price": price if price == price else 0.0,
+            "area": a,
+            "price_per_sqft": ppsf,
+            "bhk_list": str(bhks),
+            "bhk_mask": sum(1 << b for b in set(bhks) if 0 <= b < 32),
+            "livability_score": liv,
+            "investment_score": inv
+        }
+        lat, lon = coords[loc]
+        if lat is not None:
+            metadata["lat"] = float(lat)
+            metadata["lon"] = float(lon)
+        for b in sorted(set(bhks)):
+            metadata[f"bhk_{b}"] = True
+
+        metadata["content_hash"] = content_hash(full_text, metadata)
+        yield {"id": listing_id(u, t), "text": full_text, "metadata": metadata}
+
+def iter_docs(source: str = DATASET_PATH, chunksize: int = INGEST_CHUNK_SIZE, rowwise: bool = False):
+    """
+    Documents for a listings table (CSV, Parquet or Arrow) in file order, with
+    repeated ids suffixed. Columnar and chunked by default; rowwise=True is the
+    original iterrows path.
+    """
+    seen = {}
+    if rowwise:
+        df = pd.read_csv(source) if table_format(source) == "csv" else read_table(source)
+        docs = (row_to_doc(r) for _, r in df.iterrows())
+    else:
+        docs = (doc for chunk in iter_tables(source, chunksize) for doc in docs_from_frame(chunk))
+    for doc in docs:
+        # Same url + title more than once: suffix repeats in file order
+        base = doc["id"]
+        seen[base] = seen.get(base, 0) + 1
+        if seen[base] > 1:
+            doc["id"] = f"{base}-{seen[base]}"
+        yield doc
+
+def build_docs(path: str = DOCS_JSONL, chunksize: int = INGEST_CHUNK_SIZE, rowwise: bool = False,
+               use_orjson: bool = False, keyword_matrix: bool = True, source: str = DATASET_PATH):
+    """
+    Streams the listings table to JSONL. The default output is byte-identical
+    to the row-wise builder; use_orjson writes compact JSON instead (faster,
+    not byte-identical: no spaces after separators, NaN written as null).
+    """
+    print(f"Reading from {source}...")
+    if use_orjson:
+        try:
+            import orjson
+        except ImportError:
+            raise RuntimeError("use_orjson needs the orjson package (pip install orjson)")
+        dumps = lambda doc: orjson.dumps(doc).decode("utf8")
+    else:
+        dumps = lambda doc: json.dumps(doc, ensure_ascii=False)
     
     # Ensure directory exists
-    os.makedirs(os.path.dirname(DOCS_JSONL), exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
     
     count = 0
-    with open(DOCS_JSONL, "w", encoding="utf8") as f:
-        for _, r in df.iterrows():
-            doc = row_to_doc(r)
-            f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+    ids, texts = [], []
+    with open(path, "w", encoding="utf8") as f:
+        for doc in iter_docs(source, chunksize, rowwise):
+            f.write(dumps(doc) + "\n")
+            ids.append(doc["id"])
+            texts.append(keyword_text(doc["metadata"]))
             count += 1
             
-    print(f"Successfully wrote {count} documents to: {DOCS_JSONL}")
+    print(f"Successfully wrote {count} documents to: {path}")
+
+    if keyword_matrix:
+        # Keyword hits are scanned once here; re-weighting later is a sparse mat-vec
+        KeywordMatrix.build(ids, texts).save(KEYWORD_MATRIX_PATH)
 
 if __name__ == "__main__":
-    build_docs()
+    import argparse
+    parser = argparse.ArgumentParser(description="Build DOCS_JSONL from DATASET_PATH.")
+    parser.add_argument("--source", default=DATASET_PATH, help="listings table (.csv, .parquet or .arrow)")
+    parser.add_argument("--rowwise", action="store_true", help="original iterrows builder")
+    parser.add_argument("--orjson", action="store_true", help="compact orjson output (not byte-identical)")
+    parser.add_argument("--chunksize", type=int, default=INGEST_CHUNK_SIZE)
+    args = parser.parse_args()
+    build_docs(chunksize=args.chunksize, rowwise=args.rowwise, use_orjson=args.orjson, source=args.source)
@@ -0,0 +1,145 @@
+# keyword_matrix.py
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from keyword_weights import KEYWORD_WEIGHTS, KeywordScorer
+
+
+class KeywordMatrix:
+    """
+    Sparse listing x keyword hit matrix (CSR, 0/1), computed once from the
+    listing text. Keyword boosts for any weight set are then H @ w.
+
+    mode="blanked": hits follow keyword_weights (word boundaries, longest
+                    keyword first, shorter keywords inside a match do not
+                    count). Columns are in that priority order, so H @ w adds
+                    boosts in the same order as compute_keyword_scores.
+    mode="substring": plain `kw in text` hits, as in Scoring/phase3_1.py.
+
+    Changing weight values needs no rescan. Adding keywords does, and so
+    (in "blanked" mode) does removing one, since it changes what is blanked.
+    `source` optionally records text_fingerprint() of the scanned texts, so a
+    saved matrix can be checked against the current corpus before reuse.
+    """
+
+    def __init__(self, ids: List[str], vocab: List[str], hits, mode: str = "blanked", source: Optional[str] = None):
+        self.ids = list(ids)
+        self.vocab = list(vocab)
+        self.column = {kw: j for j, kw in enumerate(self.vocab)}
+        self.hits = sparse.csr_matrix(hits, dtype=np.float64)
+        self.hits.sort_indices()
+        self.mode = mode
+        self.source = source
+
+    @classmethod
+    def build(cls, ids: List[str], texts: List[str], weights: Optional[Dict] = None, mode: str = "blanked"):
+        weights = KEYWORD_WEIGHTS if weights is None else weights
+        if mode == "blanked":
+            scorer = KeywordScorer(weights)
+            vocab = scorer.keywords
+            column = {kw: j for j, kw in enumerate(vocab)}
+            rows = [[column[kw] for kw in scorer.matches(t)] for t in texts]
+        elif mode == "substring":
+            vocab = list(weights.keys())
+            lowered = ["" if not isinstance(t, str) else t.lower() for t in texts]
+            rows = [[j for j, kw in enumerate(vocab) if kw in t] for t in lowered]
+        else:
+            raise ValueError(f"Unknown keyword matrix mode: {mode}")
+
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(r) for r in rows])
+        indices = np.array([j for r in rows for j in sorted(r)], dtype=np.int32)
+        data = np.ones(len(indices), dtype=np.float64)
+        hits = sparse.csr_matrix((data, indices, indptr), shape=(len(rows), len(vocab)))
+        return cls(ids, vocab, hits, mode=mode, source=text_fingerprint(texts))
+
+    def weight_matrix(self, weights: Dict) -> np.ndarray:
+        """
+        (n_keywords x d) array from {keyword: weight or (w1, w2, ...)}; keywords
+        missing from `weights` get 0. Unknown keywords need a rebuild.
+        """
+        unknown = set(weights) - set(self.column)
+        if unknown:
+            raise ValueError(f"Keywords not in the hit matrix (rebuild it): {sorted(unknown)}")
+        first = next(iter(weights.values()))
+        dim = len(first) if isinstance(first, (tuple, list)) else 1
+        w = np.zeros((len(self.vocab), dim), dtype=np.float64)
+        for kw, value in weights.items():
+            w[self.column[kw]] = value
+        return w
+
+    def boosts(self, weights: Optional[Dict] = None, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """
+        Raw H @ w for a weight set (n_listings x d, or n_listings for scalar weights),
+        optionally clipped to [low, high].
+        """
+        w = self.weight_matrix(KEYWORD_WEIGHTS if weights is None else weights)
+        out = self.hits @ w
+        if low is not None or high is not None:
+            out = np.clip(out, low, high)
+        return out[:, 0] if out.shape[1] == 1 else out
+
+    # ---------------------------
+    # Persistence: <path>.npz (CSR) + <path>.vocab.json
+    # ---------------------------
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        sparse.save_npz(path + ".npz", self.hits)
+        with open(path + ".vocab.json", "w", encoding="utf8") as f:
+            json.dump({"mode": self.mode, "vocab": self.vocab, "ids": self.ids, "source": self.source}, f, ensure_ascii=False)
+        print(f"💾 Saved {self.hits.shape[0]}x{self.hits.shape[1]} keyword hit matrix ({self.hits.nnz} hits) to {path}.npz")
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path + ".vocab.json", encoding="utf8") as f:
+            meta = json.load(f)
+        return cls(meta["ids"], meta["vocab"], sparse.load_npz(path + ".npz"), mode=meta["mode"], source=meta.get("source"))
+
+    def covers(self, ids: List[str], source: str, keywords, mode: str) -> bool:
+        """True if this matrix was scanned from the same listings/texts and can score `keywords`."""
+        return (self.mode == mode and self.source == source and self.ids == list(ids)
+                and set(keywords) <= set(self.column))
+
+
+def text_fingerprint(texts: List[str]) -> str:
+    """sha1 over the texts a hit matrix is computed from."""
+    h = hashlib.sha1()
+    for t in texts:
+        h.update(("" if not isinstance(t, str) else t).encode("utf8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def keyword_boosts(matrix: KeywordMatrix, weights: Optional[Dict] = None) -> np.ndarray:
+    """
+    (n_listings x 2) livability/investment boosts, identical to calling
+    compute_keyword_scores on every listing text (capped to [-5, 15]).
+    """
+    return matrix.boosts(weights, low=-5.0, high=15.0)
+
+
+if __name__ == "__main__":
+    import argparse
+    from config import KEYWORD_MATRIX_PATH
+
+    parser = argparse.ArgumentParser(description="Score the corpus with a keyword weight set from the saved hit matrix.")
+    parser.add_argument("--weights", help="JSON file {keyword: [liv, inv]}; defaults to KEYWORD_WEIGHTS")
+    args = parser.parse_args()
+
+    matrix = KeywordMatrix.load(KEYWORD_MATRIX_PATH)
+    weights = None
+    if args.weights:
+        with open(args.weights, encoding="utf8") as f:
+            weights = {k: tuple(v) for k, v in json.load(f).items()}
+
+    start = time.perf_counter()
+    boosts = keyword_boosts(matrix, weights)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Scored {len(matrix.ids)} listings in {elapsed:.2f} ms")
+    print(f"Mean boost: livability {boosts[:, 0].mean():.3f}, investment {boosts[:, 1].mean():.3f}")
@@ -68,44 +68,113 @@ KEYWORD_WEIGHTS = {
     "market": (0.8, 0.2)
 }
 
+# ---------------------------
+# Compiled scoring engine
+# ---------------------------
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+class KeywordScorer:
+    """
+    Keyword boosts from one compiled regex pass.
+
+    Same result as the original loop (longest keyword first; each keyword
+    counts once; its matches are blanked so shorter keywords inside them do
+    not count again), computed as:
+      1. one scan of a lookahead alternation that reports, at every position,
+         the longest keyword starting there. Shorter keywords starting at the
+         same position are its word-boundary prefixes, known at build time.
+      2. a greedy pass over those occurrences in keyword priority order,
+         skipping any that overlap an already blanked span.
+    """
+
+    def __init__(self, weights: dict):
+        self.weights = dict(weights)
+        # Priority: longest first; ties keep dict order (stable sort, as before)
+        self.keywords = sorted(self.weights.keys(), key=len, reverse=True)
+        self.rank = {kw: i for i, kw in enumerate(self.keywords)}
+        self.pattern = re.compile(
+            r"\b(?=(" + "|".join(re.escape(kw) for kw in self.keywords) + r")\b)"
+        ) if self.keywords else None
+
+        # Keywords that also match wherever `kw` matches: proper prefixes that end on a word boundary
+        self.prefixes = {}
+        for kw in self.keywords:
+            self.prefixes[kw] = [
+                p for p in self.keywords
+                if len(p) < len(kw) and kw.startswith(p) and (_is_word(kw[len(p) - 1]) != _is_word(kw[len(p)]))
+            ]
+
+    def _occurrences(self, t: str):
+        """{keyword: [start, ...]} for every word-bounded occurrence in t."""
+        found = {}
+        for m in self.pattern.finditer(t):
+            start = m.start()
+            kw = m.group(1)
+            found.setdefault(kw, []).append(start)
+            for p in self.prefixes[kw]:
+                found.setdefault(p, []).append(start)
+        return found
+
+    def matches(self, text: str):
+        """
+        Keywords that count for `text`, in priority order.
+        """
+        if not text or not isinstance(text, str) or self.pattern is None:
+            return []
+
+        found = self._occurrences(text.lower())
+        counted = []
+        blanked = []  # (start, end) spans removed by higher-priority keywords
+        for kw in sorted(found, key=self.rank.__getitem__):
+            n = len(kw)
+            spans = []
+            last_end = -1
+            for start in found[kw]:
+                end = start + n
+                # re.sub semantics: leftmost, non-overlapping, and not inside a blanked span
+                if start < last_end or any(start < b_end and b_start < end for b_start, b_end in blanked):
+                    continue
+                spans.append((start, end))
+                last_end = end
+            if spans:
+                counted.append(kw)
+                blanked.extend(spans)
+        return counted
+
+    def score(self, text: str):
+        """
+        Returns (livability_boost, investment_boost), capped to [-5, 15].
+        """
+        liv = 0.0
+        inv = 0.0
+        for kw in self.matches(text):
+            l_boost, i_boost = self.weights[kw]
+            liv += l_boost
+            inv += i_boost
+
+        # Cap the boost to reasonable limits (+/- 15 to allow for strong signals)
+        liv = max(min(liv, 15.0), -5.0)
+        inv = max(min(inv, 15.0), -5.0)
+        return liv, inv
+
+    def score_many(self, texts):
+        """
+        Batch API: [(livability_boost, investment_boost), ...] in input order.
+        """
+        return [self.score(t) for t in texts]
+
+_SCORER = KeywordScorer(KEYWORD_WEIGHTS)
+
 def compute_keyword_scores(text: str):
     """
     Returns (livability_boost, investment_boost) derived from keywords.
     Uses Regex Word Boundaries to prevent substring matching issues.
     """
-    if not text or not isinstance(text, str):
-        return 0.0, 0.0
-    
-    # Normalize text
-    t = text.lower()
-    
-    liv = 0.0
-    inv = 0.0
-    
-    # Track matched words to avoid double counting (e.g. "Near Metro" and "Metro")
-    # We iterate by key length descending (longest phrases first)
-    sorted_keys = sorted(KEYWORD_WEIGHTS.keys(), key=len, reverse=True)
-    
-    # We mask the text as we find matches so we don't match substrings later
-    # E.g. if we find "gated community", we remove it so "community" doesn't trigger again.
-    temp_text = t 
-
-    for kw in sorted_keys:
-        # Regex \b ensures word boundaries. 
-        # e.g. matches "park" but NOT "parking" or "sparkling"
-        # re.escape handles special chars like "+" or "."
-        pattern = r'\b' + re.escape(kw) + r'\b'
-        
-        if re.search(pattern, temp_text):
-            l_boost, i_boost = KEYWORD_WEIGHTS[kw]
-            liv += l_boost
-            inv += i_boost
-            
-            # Remove the found keyword from temp_text to prevent double counting overlapping words
-            temp_text = re.sub(pattern, " ", temp_text)
+    return _SCORER.score(text)
 
-    # Cap the boost to reasonable limits (+/- 15 to allow for strong signals)
-    liv = max(min(liv, 15.0), -5.0)
-    inv = max(min(inv, 15.0), -5.0)
-    
-    return liv, inv
+def compute_keyword_scores_many(texts):
+    """
+    Batch version of compute_keyword_scores.
+    """
+    return _SCORER.score_many(texts)
@@ -0,0 +1,237 @@
+# llm_cache.py
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config import LLM_CACHE_BACKEND, LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_SIZE
+
+
+def cache_key(model, messages, response_format=None) -> str:
+    """
+    Content address for a deterministic (temperature=0) chat completion.
+    """
+    payload = json.dumps(
+        {"model": model, "messages": messages, "response_format": response_format},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf8")).hexdigest()
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+class MemoryBackend:
+    """Per-process LRU dict."""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """
+    On-disk cache shared by every worker on the host. WAL mode lets readers
+    proceed while another worker writes; the oldest entries are evicted first.
+    """
+
+    def __init__(self, path: str, max_size: int = 10000):
+        self.path = path
+        self.max_size = max_size
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache (created_at)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM llm_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+            (key, value, now, now + ttl)
+        )
+        conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+        conn.execute("""
+        DELETE FROM llm_cache WHERE key IN (
+            SELECT key FROM llm_cache ORDER BY created_at ASC
+            LIMIT max(0, (SELECT COUNT(*) FROM llm_cache) - ?)
+        )
+        """, (self.max_size,))
+        conn.commit()
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+# ---------------------------
+# Cache front-end
+# ---------------------------
+class LLMCache:
+    def __init__(self, backend, ttl: float = 86400):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model, messages, response_format=None) -> Optional[str]:
+        try:
+            value = self.backend.get(cache_key(model, messages, response_format))
+        except Exception as e:
+            print(f"⚠️ LLM cache read failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, model, messages, response_format, value: str):
+        try:
+            self.backend.set(cache_key(model, messages, response_format), value, self.ttl)
+        except Exception as e:
+            print(f"⚠️ LLM cache write failed: {e}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "size": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+def make_cache(backend=LLM_CACHE_BACKEND, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_size=LLM_CACHE_SIZE):
+    if backend == "sqlite":
+        return LLMCache(SQLiteBackend(path, max_size=max_size), ttl=ttl)
+    if backend == "memory":
+        return LLMCache(MemoryBackend(max_size=max_size), ttl=ttl)
+    return None
+
+llm_cache = make_cache()
+
+
+# ---------------------------
+# Cached chat completions (temperature=0 only)
+# ---------------------------
+def _cached_result(cached, parse):
+    """parse(cached), or None when an entry stored before validation no longer parses."""
+    try:
+        return parse(cached)
+    except Exception as e:
+        print(f"⚠️ Ignoring unparseable cached LLM reply: {e}")
+        return None
+
+def chat_completion(client, model, messages, response_format=None, temperature=0, parse=None):
+    """
+    Returns the message content of a Groq chat completion, served from the
+    cache when the call is deterministic and has been seen before.
+
+    With `parse`, returns parse(content) instead. A reply is only cached once
+    parse() accepts it, so a malformed or truncated reply raises to the
+    caller and is never pinned in the cache.
+    """
+    parse = parse or (lambda content: content)
+    cacheable = llm_cache is not None and temperature == 0
+    if cacheable:
+        cached = llm_cache.get(model, messages, response_format)
+        if cached is not None:
+            result = _cached_result(cached, parse)
+            if result is not None:
+                return result
+
+    kwargs = {"response_format": response_format} if response_format else {}
+    response = client.chat.completions.create(
+        model=model, messages=messages, temperature=temperature, **kwargs
+    )
+    content = response.choices[0].message.content
+    result = parse(content)
+
+    if cacheable:
+        llm_cache.set(model, messages, response_format, content)
+    return result
+
+async def _cache_io(fn, *args):
+    """
+    Runs a cache get/set; SQLite lookups go to a worker thread so disk I/O
+    never blocks the event loop, in-memory ones stay inline.
+    """
+    if isinstance(llm_cache.backend, SQLiteBackend):
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+async def chat_completion_async(client, model, messages, response_format=None, temperature=0, parse=None):
+    """
+    Same as chat_completion, but awaits an AsyncGroq client.
+    """
+    parse = parse or (lambda content: content)
+    cacheable = llm_cache is not None and temperature == 0
+    if cacheable:
+        cached = await _cache_io(llm_cache.get, model, messages, response_format)
+        if cached is not None:
+            result = _cached_result(cached, parse)
+            if result is not None:
+                return result
+
+    kwargs = {"response_format": response_format} if response_format else {}
+    response = await client.chat.completions.create(
+        model=model, messages=messages, temperature=temperature, **kwargs
+    )
+    content = response.choices[0].message.content
+    result = parse(content)
+
+    if cacheable:
+        await _cache_io(llm_cache.set, model, messages, response_format, content)
+    return result
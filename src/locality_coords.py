@@ -1,5 +1,3 @@
-import difflib
-
 LOCALITY_COORDS = {
     "whitefield": (12.9698, 77.7499),
     "whitefield hope farm": (12.9845, 77.7492),
@@ -351,28 +349,19 @@ LOCALITY_COORDS = {
 ALL_LOCALITIES = list(LOCALITY_COORDS.keys())
 
 
-def get_coords_for_locality(name: str):
+def get_coords_for_locality(name: str, min_confidence: float = 0.0):
     """
-    1. Case-normalize
-    2. Try exact match
-    3. Try best fuzzy match
+    Returns (lat, lon, matched_name, confidence): 1.0 for an exact name, the
+    resolver's fuzzy score (0-1) otherwise, (None, None, None, 0.0) when
+    unresolved or below min_confidence.
+    Delegates to the shared, memoized locality_resolver.
     """
+    from locality_resolver import resolve  # imported lazily: the resolver imports this module
+
     if not name:
         return None, None, None, 0.0
 
-    s = name.lower().strip()
-
-    # 1. Exact match
-    if s in LOCALITY_COORDS:
-        lat, lon = LOCALITY_COORDS[s]
-        return lat, lon, s, 1.0
-
-    # 2. Fuzzy match
-    best = difflib.get_close_matches(s, ALL_LOCALITIES, n=1, cutoff=0.6)
-    if best:
-        key = best[0]
-        lat, lon = LOCALITY_COORDS[key]
-        return lat, lon, key, 0.8
-
-    return None, None, None, 0.0
-
+    r = resolve(name)
+    if r.canonical is None or r.confidence < min_confidence:
+        return None, None, None, 0.0
+    return r.lat, r.lon, r.canonical, r.confidence
@@ -141,22 +141,11 @@ SORTED_LOCALITIES = sorted(LOCALITY_TO_ZONE.keys(), key=len, reverse=True)
 
 def infer_zone_from_locality(locality: str):
     """
-    Infers the zone based on the locality string.
+    Infers the zone based on the locality string: exact match, else the
+    longest known locality contained in it (memoized in locality_resolver).
     """
+    from locality_resolver import zone_for  # imported lazily: the resolver imports this module
+
     if not locality or not isinstance(locality, str):
         return "Unknown"
-
-    # Normalize: lowercase and remove special characters (keep alphanumeric and spaces)
-    clean_text = locality.lower().strip()
-    
-    # 1. Exact Match Check (Fastest)
-    if clean_text in LOCALITY_TO_ZONE:
-        return LOCALITY_TO_ZONE[clean_text]
-
-    # 2. Substring Match (Longest string first)
-    for loc in SORTED_LOCALITIES:
-        # We check if the locality key exists in the input text
-        if loc in clean_text:
-            return LOCALITY_TO_ZONE[loc]
-    
-    return "Unknown"
+    return zone_for(locality.lower().strip())
@@ -0,0 +1,150 @@
+# locality_resolver.py
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from locality_coords import LOCALITY_COORDS
+from locality_map import LOCALITY_TO_ZONE, SORTED_LOCALITIES
+
+# (canonical name, zone, lat, lon, confidence 0-1). canonical/lat/lon are None when unresolved.
+Resolution = namedtuple("Resolution", ["canonical", "zone", "lat", "lon", "confidence"])
+
+MIN_SCORE = 60.0      # similarity (0-100, see scores()) needed to accept a fuzzy match
+ZONE_FROM_MATCH = 0.85  # borrow the matched name's zone only above this confidence
+COORDS_FROM_MATCH = 0.85  # trust a fuzzy match's coordinates for geo filtering only above this
+CACHE_SIZE = 4096     # distinct strings memoized
+
+# ---------------------------
+# Index
+# ---------------------------
+CHOICES = list(LOCALITY_COORDS.keys())
+
+def normalize(text) -> str:
+    return " ".join(str(text).lower().split())
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+_TRIGRAM_INDEX = defaultdict(list)  # trigram -> [choice index, ...]
+for _i, _name in enumerate(CHOICES):
+    for _g in _trigrams(_name):
+        _TRIGRAM_INDEX[_g].append(_i)
+
+def candidates(text: str) -> List[int]:
+    """
+    Indices into CHOICES sharing at least one trigram with `text`, in CHOICES order.
+    """
+    found = set()
+    for g in _trigrams(text):
+        found.update(_TRIGRAM_INDEX.get(g, ()))
+    return sorted(found)
+
+# ---------------------------
+# Zones
+# ---------------------------
+@lru_cache(maxsize=CACHE_SIZE)
+def zone_for(text: str) -> str:
+    """
+    Zone for a normalized locality string: exact LOCALITY_TO_ZONE key, else the
+    longest known locality contained in it, else "Unknown".
+    """
+    if text in LOCALITY_TO_ZONE:
+        return LOCALITY_TO_ZONE[text]
+    for loc in SORTED_LOCALITIES:
+        if loc in text:
+            return LOCALITY_TO_ZONE[loc]
+    return "Unknown"
+
+def _build(text: str, canonical: Optional[str], confidence: float) -> Resolution:
+    zone = zone_for(text)
+    if canonical is None:
+        return Resolution(None, zone, None, None, confidence)
+    if zone == "Unknown" and confidence >= ZONE_FROM_MATCH:
+        zone = zone_for(canonical)
+    lat, lon = LOCALITY_COORDS[canonical]
+    return Resolution(canonical, zone, lat, lon, confidence)
+
+# ---------------------------
+# Resolution
+# ---------------------------
+def scores(texts: List[str], choices: List[str]) -> np.ndarray:
+    """
+    (len(texts), len(choices)) similarity matrix, 0-100: the better of
+    fuzz.token_sort_ratio (word order ignored, "layout hsr" == "hsr layout",
+    as the old fuzzy_logic scorer) and fuzz.ratio (keeps spacing variants
+    such as "kaval bairasandra" ~ "kavalbyrasandra").
+    """
+    kwargs = {"dtype": np.float64, "workers": -1 if len(texts) > 1 else 1}
+    return np.maximum(
+        process.cdist(texts, choices, scorer=fuzz.ratio, **kwargs),
+        process.cdist(texts, choices, scorer=fuzz.token_sort_ratio, **kwargs),
+    )
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _resolve(text: str, min_score: float) -> Resolution:
+    if text in LOCALITY_COORDS:
+        return _build(text, text, 1.0)
+
+    cand = candidates(text)
+    if not cand:
+        return _build(text, None, 0.0)
+    row = scores([text], [CHOICES[i] for i in cand])[0]
+    best = int(row.argmax())
+    name, score = CHOICES[cand[best]], float(row[best])
+    if score < min_score:
+        return _build(text, None, score / 100)
+    return _build(text, name, score / 100)
+
+def resolve(text, min_score: float = MIN_SCORE) -> Resolution:
+    """
+    Resolves free-text locality to (canonical, zone, lat, lon, confidence).
+    Exact names score 1.0; otherwise the best scores() match among trigram
+    candidates, accepted at >= min_score.
+    """
+    if not text or not isinstance(text, str):
+        return Resolution(None, "Unknown", None, None, 0.0)
+    return _resolve(normalize(text), float(min_score))
+
+def resolve_many(texts: Iterable[str], min_score: float = MIN_SCORE) -> List[Resolution]:
+    """
+    Bulk version of resolve(): unique strings are scored against every
+    choice in one scores() call (restricted to the same trigram
+    candidates), so results match resolve() exactly.
+    """
+    texts = list(texts)
+    norm = [normalize(t) if t and isinstance(t, str) else None for t in texts]
+    misses = sorted({n for n in norm if n is not None and n not in LOCALITY_COORDS})
+
+    resolved = {}
+    if misses:
+        matrix = scores(misses, CHOICES)
+        allowed = np.zeros_like(matrix, dtype=bool)
+        for row, text in enumerate(misses):
+            allowed[row, candidates(text)] = True
+        matrix = np.where(allowed, matrix, -1.0)
+        best = matrix.argmax(axis=1)
+        for row, text in enumerate(misses):
+            score = float(matrix[row, best[row]])
+            if score < 0:
+                resolved[text] = _build(text, None, 0.0)
+            elif score < min_score:
+                resolved[text] = _build(text, None, score / 100)
+            else:
+                resolved[text] = _build(text, CHOICES[best[row]], score / 100)
+
+    out = []
+    for n in norm:
+        if n is None:
+            out.append(Resolution(None, "Unknown", None, None, 0.0))
+        elif n in LOCALITY_COORDS:
+            out.append(_build(n, n, 1.0))
+        else:
+            out.append(resolved[n])
+    return out
+
+def cache_info():
+    return {"resolve": _resolve.cache_info()._asdict(), "zone_for": zone_for.cache_info()._asdict()}
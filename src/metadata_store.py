@@ -0,0 +1,185 @@
+# metadata_store.py
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+NUMERIC_FIELDS = ["exact_price", "area", "price_per_sqft", "livability_score", "investment_score", "lat", "lon"]
+
+
+def parse_bhk_list(value) -> List[int]:
+    """'[2, 3]' (as stored by ingest.row_to_doc) -> [2, 3]"""
+    clean = str(value or "").replace("[", "").replace("]", "")
+    out = []
+    for x in clean.split(","):
+        try:
+            out.append(int(float(x.strip())))
+        except ValueError:
+            continue
+    return out
+
+def bhk_to_mask(bhks: Iterable[int]) -> int:
+    """[2, 3] -> 0b1100; bit n is set when n BHK is offered."""
+    mask = 0
+    for b in bhks:
+        if 0 <= int(b) < 32:
+            mask |= 1 << int(b)
+    return mask
+
+def _number(value) -> float:
+    """Numeric metadata value, NaN when missing or not a number."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+class MetadataStore:
+    """
+    Columnar copy of the listing metadata produced by ingest.row_to_doc.
+
+    One NumPy array per field (float64 numbers with NaN for missing values,
+    int16 zone codes, uint32 BHK bitmask), so Chroma-style where clauses are
+    evaluated as vectorized masks instead of row by row. Like Chroma, a
+    condition never matches a listing that lacks the field.
+    """
+
+    def __init__(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        self.ids = np.array(ids, dtype=object)
+        self.metadatas = metadatas
+        self.columns = {
+            field: np.array([_number(m.get(field)) if m else np.nan for m in metadatas], dtype=np.float64)
+            for field in NUMERIC_FIELDS
+        }
+        self.zones = sorted({str(m.get("zone", "Unknown")) for m in metadatas})
+        zone_index = {z: i for i, z in enumerate(self.zones)}
+        self.zone_code = np.array([zone_index[str(m.get("zone", "Unknown"))] for m in metadatas], dtype=np.int16)
+        self.bhk_mask = np.array([
+            m["bhk_mask"] if "bhk_mask" in m else bhk_to_mask(parse_bhk_list(m.get("bhk_list")))
+            for m in metadatas
+        ], dtype=np.uint32)
+        self._generic = {}
+
+    @classmethod
+    def from_docs(cls, docs: Iterable[Dict[str, Any]]):
+        """Docs as written to DOCS_JSONL: {"id", "text", "metadata"}."""
+        docs = list(docs)
+        return cls([str(d["id"]) for d in docs], [d["metadata"] for d in docs])
+
+    @classmethod
+    def from_collection(cls, collection, page_size: int = 5000):
+        """Metadata of every listing in a Chroma collection (no embeddings)."""
+        ids, metas = [], []
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            ids.extend(page["ids"])
+            metas.extend(m or {} for m in page["metadatas"])
+            offset += len(page["ids"])
+        print(f"🗂️ Loaded metadata for {len(ids)} listings into MetadataStore")
+        return cls(ids, metas)
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ---------------------------
+    # Field masks
+    # ---------------------------
+    def zone_mask(self, zones) -> np.ndarray:
+        if isinstance(zones, str):
+            zones = [zones]
+        codes = [self.zones.index(z) for z in zones if z in self.zones]
+        return np.isin(self.zone_code, codes)
+
+    def bhk_any_mask(self, bhks: Iterable[int]) -> np.ndarray:
+        """Listings offering any of the given BHK counts."""
+        return (self.bhk_mask & np.uint32(bhk_to_mask(bhks))) != 0
+
+    def _column(self, field):
+        """
+        Cached (values, present, numeric) arrays for one metadata field.
+        """
+        if field in self.columns:
+            numeric = self.columns[field]
+            return numeric, ~np.isnan(numeric), numeric
+        col = self._generic.get(field)
+        if col is None:
+            raw = [m.get(field) if m else None for m in self.metadatas]
+            values = np.empty(len(raw), dtype=object)
+            values[:] = raw
+            present = np.array([v is not None for v in raw], dtype=bool)
+            numeric = np.array([_number(v) for v in raw], dtype=np.float64)
+            col = (values, present, numeric)
+            self._generic[field] = col
+        return col
+
+    def _fast_condition(self, field, cond) -> Optional[np.ndarray]:
+        """
+        Zone and per-BHK flag conditions answered from the int16 zone codes /
+        uint32 BHK bitmask; None when the generic path applies.
+        """
+        if len(cond) != 1:
+            return None
+        (op, target), = cond.items()
+        if field == "zone" and op in ("$eq", "$in"):
+            _, present, _ = self._column(field)
+            return self.zone_mask(target) & present
+        bhk = field[4:] if field.startswith("bhk_") else ""
+        if bhk.isdigit() and int(bhk) < 32 and op == "$eq" and target is True:
+            return self.bhk_any_mask([int(bhk)])
+        return None
+
+    def _condition(self, field, cond) -> np.ndarray:
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        fast = self._fast_condition(field, cond)
+        if fast is not None:
+            return fast
+
+        values, present, numeric = self._column(field)
+        mask = present.copy()
+        for op, target in cond.items():
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                with np.errstate(invalid="ignore"):
+                    if op == "$gt": m = numeric > target
+                    elif op == "$gte": m = numeric >= target
+                    elif op == "$lt": m = numeric < target
+                    else: m = numeric <= target
+            elif op == "$eq":
+                m = values == target
+            elif op == "$ne":
+                m = values != target
+            elif op == "$in":
+                m = np.isin(values, list(target))
+            elif op == "$nin":
+                m = ~np.isin(values, list(target))
+            else:
+                raise ValueError(f"Unsupported where operator: {op}")
+            mask &= np.asarray(m, dtype=bool)
+        return mask
+
+    # ---------------------------
+    # Where clause -> mask / candidate ids
+    # ---------------------------
+    def mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """
+        Boolean mask of listings matching a Chroma where clause
+        (as built by api.build_chroma_filters / with_geo).
+        """
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, value in (where or {}).items():
+            if key == "$and":
+                for sub in value:
+                    mask &= self.mask(sub)
+            elif key == "$or":
+                any_mask = np.zeros(len(self.ids), dtype=bool)
+                for sub in value:
+                    any_mask |= self.mask(sub)
+                mask &= any_mask
+            else:
+                mask &= self._condition(key, value)
+        return mask
+
+    def filter_ids(self, where: Optional[Dict[str, Any]]) -> List[str]:
+        """Candidate ids matching a where clause (see mask())."""
+        return self.ids[self.mask(where)].tolist()
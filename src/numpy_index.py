@@ -0,0 +1,83 @@
+# numpy_index.py
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from metadata_store import MetadataStore
+
+
+class NumpyIndex:
+    """
+    Exact in-memory vector index: one float32 (N x D) matrix of normalized
+    embeddings, searched with a matmul + argpartition.
+
+    query() mirrors chromadb's Collection.query (ids / documents / metadatas /
+    distances as lists of lists, cosine distance = 1 - similarity) and accepts
+    the same where-clause dialect, evaluated as boolean masks by the columnar
+    MetadataStore.
+    """
+
+    def __init__(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict[str, Any]]):
+        self.ids = list(ids)
+        self.embeddings = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+        self.documents = list(documents)
+        self.metadatas = list(metadatas)
+        self.store = MetadataStore(self.ids, self.metadatas)
+
+    @classmethod
+    def from_chroma(cls, collection, page_size: int = 5000):
+        ids, embs, docs, metas = [], [], [], []
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=page_size, offset=offset
+            )
+            if not page["ids"]:
+                break
+            ids.extend(page["ids"])
+            embs.append(np.asarray(page["embeddings"], dtype=np.float32))
+            docs.extend(page["documents"])
+            metas.extend(page["metadatas"])
+            offset += len(page["ids"])
+
+        dim = embs[0].shape[1] if embs else 0
+        matrix = np.concatenate(embs) if embs else np.zeros((0, dim), dtype=np.float32)
+        print(f"🧮 Loaded {len(ids)} vectors into NumpyIndex")
+        return cls(ids, matrix, docs, metas)
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def where_mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        return self.store.mask(where) if where else None
+
+    # ---------------------------
+    # Search
+    # ---------------------------
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[Dict[str, Any]] = None, **kwargs):
+        q = np.asarray(query_embeddings, dtype=np.float32)
+        if q.ndim == 1:
+            q = q[None, :]
+
+        mask = self.where_mask(where)
+        rows = np.flatnonzero(mask) if mask is not None else None
+        matrix = self.embeddings if rows is None else self.embeddings[rows]
+
+        out = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        k = min(n_results, matrix.shape[0])
+        if k == 0:
+            for key in out:
+                out[key] = [[] for _ in range(len(q))]
+            return out
+
+        sims = q @ matrix.T  # (m, n)
+        for row_sims in sims:
+            top = np.argpartition(-row_sims, k - 1)[:k] if k < len(row_sims) else np.arange(len(row_sims))
+            top = top[np.argsort(-row_sims[top], kind="stable")]
+            idx = top if rows is None else rows[top]
+            out["ids"].append([self.ids[i] for i in idx])
+            out["documents"].append([self.documents[i] for i in idx])
+            out["metadatas"].append([self.metadatas[i] for i in idx])
+            out["distances"].append((1.0 - row_sims[top]).tolist())
+        return out
@@ -1,6 +1,6 @@
-from typing import Dict, Any, Optional
-from keyword_weights import compute_keyword_scores
-import math
+from typing import Dict, Any, List, Optional
+from keyword_weights import compute_keyword_scores, compute_keyword_scores_many
+import numpy as np
 
 # Base Weights (Sum = 1.0)
 BASE_WEIGHTS = {
@@ -36,6 +36,12 @@ def calculate_affordability(price: float, budget_max: float) -> float:
     else:
         return 0.0
 
+def keyword_text(doc_meta: Dict[str, Any]) -> str:
+    """
+    Text the keyword boosts are computed from (also what ingest indexes into the keyword hit matrix).
+    """
+    return doc_meta.get("text") or (str(doc_meta.get("title", "")) + " " + str(doc_meta.get("description", "")))
+
 def compute_final_score(doc_meta: Dict[str, Any], user_filters: Dict[str, Any], sim_score: float = 0.5) -> float:
     """
     Computes a final 0-100 score dynamically adjusting weights based on available data.
@@ -51,8 +57,7 @@ def compute_final_score(doc_meta: Dict[str, Any], user_filters: Dict[str, Any],
     # 2. Keyword Boosts
     # Combine title and description text
     # We look at 'text' first (standard in RAG), then fallback to title
-    raw_text = doc_meta.get("text") or (str(doc_meta.get("title", "")) + " " + str(doc_meta.get("description", "")))
-    kw_liv, kw_inv = compute_keyword_scores(raw_text)
+    kw_liv, kw_inv = compute_keyword_scores(keyword_text(doc_meta))
     
     # Apply boosts (Scale 0-10)
     # We clamp the result to max 10.0 so keywords don't break the math
@@ -86,3 +91,79 @@ def compute_final_score(doc_meta: Dict[str, Any], user_filters: Dict[str, Any],
     
     # Scale back to 0-100
     return round(final_score * 10.0, 1)
+
+
+# ---------------------------
+# Batch scoring (NumPy)
+# ---------------------------
+def calculate_affordability_many(prices, budget_max: float) -> np.ndarray:
+    """
+    calculate_affordability() over an array of prices.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if not budget_max:
+        return np.full(prices.shape, 5.0)
+    ratio = prices / float(budget_max)
+    return np.select(
+        [prices <= 0, ratio <= 1.0, ratio <= 1.1, ratio <= 1.2],
+        [5.0, 10.0, 10.0 - ((ratio - 1.0) * 50.0), 5.0 - ((ratio - 1.1) * 50.0)],
+        default=0.0,
+    )
+
+def compute_final_scores(liv, inv, price, sim, kw_liv, kw_inv, budget_max: Optional[float] = None) -> np.ndarray:
+    """
+    compute_final_score() for a whole candidate set. Inputs are equal-length arrays:
+    livability/investment (0-100), price, similarity (0-1) and keyword boosts.
+    Output matches the per-document function exactly.
+    """
+    liv_base = np.asarray(liv, dtype=np.float64) / 10.0
+    inv_base = np.asarray(inv, dtype=np.float64) / 10.0
+    liv_boosted = liv_base + (np.asarray(kw_liv, dtype=np.float64) / 3.0)
+    inv_boosted = inv_base + (np.asarray(kw_inv, dtype=np.float64) / 3.0)
+    # min(10.0, x) semantics (NaN -> 10.0)
+    liv_final = np.where(liv_boosted < 10.0, liv_boosted, 10.0)
+    inv_final = np.where(inv_boosted < 10.0, inv_boosted, 10.0)
+
+    aff_score = calculate_affordability_many(price, budget_max)
+    sim_score_scaled = np.asarray(sim, dtype=np.float64) * 10.0
+
+    weights = BASE_WEIGHTS.copy()
+    if not budget_max:
+        weights["aff"] = 0.0
+        remaining_weight = 1.0 - BASE_WEIGHTS["aff"]
+        weights["liv"] /= remaining_weight
+        weights["inv"] /= remaining_weight
+        weights["sim"] /= remaining_weight
+
+    final_score = (
+        (weights["liv"] * liv_final) +
+        (weights["inv"] * inv_final) +
+        (weights["aff"] * aff_score) +
+        (weights["sim"] * sim_score_scaled)
+    )
+    # Python round (correctly rounded) rather than np.round, to match the reference
+    return np.array([round(v, 1) for v in (final_score * 10.0).tolist()], dtype=np.float64)
+
+def compute_final_scores_for(metas: List[Dict[str, Any]], user_filters: Dict[str, Any], sim_scores,
+                             keyword_boosts=None) -> np.ndarray:
+    """
+    Batch counterpart of compute_final_score(doc_meta, user_filters, sim_score).
+    keyword_boosts: optional (n x 2) livability/investment boosts already looked
+    up (e.g. from the keyword hit matrix); NaN rows are scanned from the text.
+    """
+    if keyword_boosts is None:
+        kw = np.array(compute_keyword_scores_many([keyword_text(m) for m in metas]), dtype=np.float64).reshape(-1, 2)
+    else:
+        kw = np.array(keyword_boosts, dtype=np.float64).reshape(-1, 2)
+        missing = np.flatnonzero(np.isnan(kw).any(axis=1))
+        if missing.size:
+            kw[missing] = compute_keyword_scores_many([keyword_text(metas[i]) for i in missing])
+    return compute_final_scores(
+        [float(m.get("livability_score", 50.0)) for m in metas],
+        [float(m.get("investment_score", 50.0)) for m in metas],
+        [float(m.get("exact_price", 0.0)) for m in metas],
+        sim_scores,
+        kw[:, 0],
+        kw[:, 1],
+        budget_max=user_filters.get("budget_max"),
+    )
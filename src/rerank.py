@@ -1,19 +1,16 @@
 import json
-from config import GROQ_MODEL
+import asyncio
+import inspect
+from config import (
+    GROQ_MODEL, RERANK_BACKEND, CROSS_ENCODER_MODEL, CROSS_ENCODER_BACKEND,
+    CROSS_ENCODER_ONNX_FILE, CROSS_ENCODER_BATCH_SIZE,
+)
+from llm_cache import chat_completion, chat_completion_async
 
-def rerank(client, query, docs, top_k=5):
-    """
-    Reranks documents using Groq (Llama-3).
-    """
-    if not docs:
-        return []
-
-    # Limit to top 20
-    candidate_docs = docs[:20] 
-    
+def _build_prompt(query, candidate_docs, top_k):
     docs_text = ""
     doc_map = {}
-    
+
     for i, d in enumerate(candidate_docs):
         short_id = str(i)
         doc_map[short_id] = d
@@ -28,7 +25,7 @@ def rerank(client, query, docs, top_k=5):
         docs_text += snippet
 
     system_msg = "You are a ranking assistant. You must output JSON only."
-    
+
     user_msg = f"""
     Query: "{query}"
     
@@ -39,42 +36,180 @@ def rerank(client, query, docs, top_k=5):
     Listings:
     {docs_text}
     """
+    messages = [
+        {"role": "system", "content": system_msg},
+        {"role": "user", "content": user_msg}
+    ]
+    return messages, doc_map
+
+def _apply_ranking(content, candidate_docs, doc_map):
+    result = json.loads(content)
+    rankings = result.get("ranking", [])
+
+    reranked_docs = []
+    for r in rankings:
+        d_id = str(r.get("id"))
+        if d_id in doc_map:
+            original_doc = doc_map[d_id].copy()
+            original_doc["score"] = float(r.get("relevance_score", 0))
+            reranked_docs.append(original_doc)
+
+    # Fill rest
+    returned_ids = set(str(r.get("id")) for r in rankings)
+    for i, d in enumerate(candidate_docs):
+        if str(i) not in returned_ids:
+            d_copy = d.copy()
+            d_copy["score"] = 0.1
+            reranked_docs.append(d_copy)
+
+    reranked_docs.sort(key=lambda x: x["score"], reverse=True)
+    return reranked_docs
+
+def _original_order(docs, top_k):
+    for d in docs:
+        d["score"] = 0.5
+    return docs[:top_k]
+
+# ---------------------------
+# Groq (LLM) backend
+# ---------------------------
+def _rerank_groq(client, query, docs, top_k=5):
+    """
+    Reranks documents using Groq (Llama-3).
+    """
+    if not docs:
+        return []
+
+    # Limit to top 20
+    candidate_docs = docs[:20]
+    messages, doc_map = _build_prompt(query, candidate_docs, top_k)
+
+    try:
+        # Parsed inside the call so only a usable ranking reply gets cached
+        return chat_completion(
+            client,
+            model=GROQ_MODEL,
+            messages=messages,
+            response_format={"type": "json_object"},
+            temperature=0,
+            parse=lambda content: _apply_ranking(content, candidate_docs, doc_map)
+        )
+
+    except Exception as e:
+        print(f"⚠️ Groq Rerank failed: {e}. Returning original order.")
+        return _original_order(docs, top_k)
+
+async def _rerank_groq_async(client, query, docs, top_k=5):
+    """
+    Same as _rerank_groq, but awaits an AsyncGroq client.
+    """
+    if not docs:
+        return []
+
+    candidate_docs = docs[:20]
+    messages, doc_map = _build_prompt(query, candidate_docs, top_k)
 
     try:
-        response = client.chat.completions.create(
+        # Parsed inside the call so only a usable ranking reply gets cached
+        return await chat_completion_async(
+            client,
             model=GROQ_MODEL,
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": user_msg}
-            ],
+            messages=messages,
             response_format={"type": "json_object"},
-            temperature=0
+            temperature=0,
+            parse=lambda content: _apply_ranking(content, candidate_docs, doc_map)
         )
-        
-        result = json.loads(response.choices[0].message.content)
-        rankings = result.get("ranking", [])
-        
-        reranked_docs = []
-        for r in rankings:
-            d_id = str(r.get("id"))
-            if d_id in doc_map:
-                original_doc = doc_map[d_id].copy()
-                original_doc["score"] = float(r.get("relevance_score", 0))
-                reranked_docs.append(original_doc)
-        
-        # Fill rest
-        returned_ids = set(str(r.get("id")) for r in rankings)
-        for i, d in enumerate(candidate_docs):
-            if str(i) not in returned_ids:
-                d_copy = d.copy()
-                d_copy["score"] = 0.1 
-                reranked_docs.append(d_copy)
-
-        reranked_docs.sort(key=lambda x: x["score"], reverse=True)
-        return reranked_docs
 
     except Exception as e:
         print(f"⚠️ Groq Rerank failed: {e}. Returning original order.")
-        for d in docs:
-            d["score"] = 0.5
-        return docs[:top_k]
+        return _original_order(docs, top_k)
+
+# ---------------------------
+# Local cross-encoder backend
+# ---------------------------
+_cross_encoder = None
+_predict_kwargs = {}
+
+def _get_cross_encoder():
+    """
+    Lazily loads the cross-encoder on CPU. With CROSS_ENCODER_BACKEND=onnx the
+    model runs through ONNX Runtime; CROSS_ENCODER_ONNX_FILE can point at a
+    quantized export (e.g. onnx/model_qint8_avx512_vnni.onnx).
+    """
+    global _cross_encoder, _predict_kwargs
+    if _cross_encoder is None:
+        import torch
+        from sentence_transformers import CrossEncoder
+
+        kwargs = {"device": "cpu"}
+        if CROSS_ENCODER_BACKEND != "torch":
+            kwargs["backend"] = CROSS_ENCODER_BACKEND
+            if CROSS_ENCODER_ONNX_FILE:
+                kwargs["model_kwargs"] = {"file_name": CROSS_ENCODER_ONNX_FILE}
+        print(f"Loading cross-encoder: {CROSS_ENCODER_MODEL} ({CROSS_ENCODER_BACKEND})...")
+        _cross_encoder = CrossEncoder(CROSS_ENCODER_MODEL, **kwargs)
+        # Always a single Sigmoid, so scores are on the 0.0-1.0 scale the other
+        # backends use whatever activation the model config does or doesn't set
+        # (sentence-transformers 4 renamed activation_fct to activation_fn)
+        params = inspect.signature(_cross_encoder.predict).parameters
+        name = "activation_fn" if "activation_fn" in params else "activation_fct"
+        _predict_kwargs = {name: torch.nn.Sigmoid()}
+    return _cross_encoder
+
+def _rerank_cross_encoder(client, query, docs, top_k=5):
+    """
+    Scores (query, listing) pairs in one batched CPU forward pass. `client` is
+    unused; it is kept so every backend shares the rerank() signature.
+    """
+    if not docs:
+        return []
+
+    candidate_docs = docs[:20]
+    try:
+        model = _get_cross_encoder()
+        scores = model.predict(
+            [(query, d.get("text", "")) for d in candidate_docs],
+            batch_size=CROSS_ENCODER_BATCH_SIZE,
+            show_progress_bar=False,
+            **_predict_kwargs
+        )
+    except Exception as e:
+        print(f"⚠️ Cross-encoder Rerank failed: {e}. Returning original order.")
+        return _original_order(docs, top_k)
+
+    reranked_docs = []
+    for d, score in zip(candidate_docs, scores):
+        d_copy = d.copy()
+        d_copy["score"] = float(score)
+        reranked_docs.append(d_copy)
+
+    reranked_docs.sort(key=lambda x: x["score"], reverse=True)
+    return reranked_docs
+
+# ---------------------------
+# Backend selection
+# ---------------------------
+# Every backend takes (client, query, docs, top_k) and returns the candidates
+# sorted by "score" (higher is more relevant, 0.0 to 1.0).
+RERANKERS = {
+    "groq": _rerank_groq,
+    "cross_encoder": _rerank_cross_encoder,
+}
+
+def rerank(client, query, docs, top_k=5):
+    """
+    Reranks documents with the backend selected by RERANK_BACKEND.
+    """
+    return RERANKERS.get(RERANK_BACKEND, _rerank_groq)(client, query, docs, top_k)
+
+async def rerank_async(client, query, docs, top_k=5, executor=None):
+    """
+    Async rerank: Groq is awaited directly; local backends run on `executor`
+    so CPU inference never blocks the event loop.
+    """
+    backend = RERANKERS.get(RERANK_BACKEND, _rerank_groq)
+    if backend is _rerank_groq:
+        return await _rerank_groq_async(client, query, docs, top_k)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, backend, client, query, docs, top_k)
@@ -0,0 +1,96 @@
+# semantic_cache.py
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Answer cache for near-duplicate questions.
+
+    An entry stores (query embedding, filters key, retrieved listings, summary,
+    retrieval depth).
+    A lookup hits when the filters key matches exactly and the cosine similarity
+    of the (normalized) query embeddings is >= threshold. All entries are
+    dropped when the index version changes.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_size: int = 1000):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.version = None
+        self._entries = OrderedDict()  # entry_id -> entry dict
+        self._by_filters = {}          # filters_key -> [entry_id, ...]
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, version):
+        if version != self.version:
+            self._entries.clear()
+            self._by_filters.clear()
+            self.version = version
+
+    def lookup(self, query_emb, filters_key: str, version) -> Optional[dict]:
+        """
+        Returns {"retrieved": [...], "summary": str, "retrieval_depth": int,
+        "similarity": float} or None.
+        """
+        q = np.asarray(query_emb, dtype=np.float32)
+        with self._lock:
+            self._check_version(version)
+            entry_ids = self._by_filters.get(filters_key, [])
+            if entry_ids:
+                embs = np.stack([self._entries[e]["emb"] for e in entry_ids])
+                sims = embs @ q
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    entry_id = entry_ids[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    entry = self._entries[entry_id]
+                    return {
+                        "retrieved": entry["retrieved"],
+                        "summary": entry["summary"],
+                        "retrieval_depth": entry["retrieval_depth"],
+                        "similarity": float(sims[best])
+                    }
+            self.misses += 1
+            return None
+
+    def store(self, query_emb, filters_key: str, version, retrieved, summary: str,
+              retrieval_depth: Optional[int] = None) -> None:
+        with self._lock:
+            self._check_version(version)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                "emb": np.asarray(query_emb, dtype=np.float32),
+                "filters_key": filters_key,
+                "retrieved": retrieved,
+                "summary": summary,
+                "retrieval_depth": retrieval_depth
+            }
+            self._by_filters.setdefault(filters_key, []).append(entry_id)
+
+            while len(self._entries) > self.max_size:
+                old_id, old = self._entries.popitem(last=False)
+                siblings = self._by_filters[old["filters_key"]]
+                siblings.remove(old_id)
+                if not siblings:
+                    del self._by_filters[old["filters_key"]]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
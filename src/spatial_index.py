@@ -0,0 +1,108 @@
+# spatial_index.py
+import math
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from distance_utils import KM_PER_DEG_LAT, bounding_box, distances_km
+
+
+class SpatialIndex:
+    """
+    Uniform lat/lon grid over listing coordinates.
+
+    Each cell is `cell_deg` degrees on a side (~5.5 km at the default), so a
+    radius query only measures exact haversine distances for the listings in
+    the handful of cells overlapping its bounding box.
+    """
+
+    def __init__(self, points: List[Tuple[str, float, float]], cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self.ids = [p[0] for p in points]
+        self.lats = np.array([p[1] for p in points], dtype=np.float64)
+        self.lons = np.array([p[2] for p in points], dtype=np.float64)
+        cells = defaultdict(list)
+        for i, (lat, lon) in enumerate(zip(self.lats, self.lons)):
+            cells[self._cell(lat, lon)].append(i)
+        self.cells = {key: np.array(idx, dtype=np.int64) for key, idx in cells.items()}
+
+        # Smallest cell width in km (longitude cells shrink away from the equator)
+        max_abs_lat = float(np.abs(self.lats).max()) if len(self.lats) else 0.0
+        self.cell_km = cell_deg * KM_PER_DEG_LAT * math.cos(math.radians(max_abs_lat))
+
+    @classmethod
+    def from_metadatas(cls, ids: List[str], metadatas: List[Dict], cell_deg: float = 0.05):
+        points = [
+            (str(i), float(m["lat"]), float(m["lon"]))
+            for i, m in zip(ids, metadatas)
+            if m and m.get("lat") is not None and m.get("lon") is not None
+        ]
+        return cls(points, cell_deg=cell_deg)
+
+    @classmethod
+    def from_collection(cls, collection, cell_deg: float = 0.05):
+        data = collection.get(include=["metadatas"])
+        index = cls.from_metadatas(data["ids"], data["metadatas"], cell_deg=cell_deg)
+        print(f"🗺️ Spatial index: {len(index)} of {len(data['ids'])} listings have coordinates")
+        return index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        """
+        [(listing_id, distance_km)] for every listing within radius_km, nearest first.
+        """
+        lat_min, lat_max, lon_min, lon_max = bounding_box(lat, lon, radius_km)
+        i0, j0 = self._cell(lat_min, lon_min)
+        i1, j1 = self._cell(lat_max, lon_max)
+
+        blocks = [
+            self.cells[(ci, cj)]
+            for ci in range(i0, i1 + 1)
+            for cj in range(j0, j1 + 1)
+            if (ci, cj) in self.cells
+        ]
+        if not blocks:
+            return []
+        idx = np.concatenate(blocks)
+        d = distances_km(lat, lon, self.lats[idx], self.lons[idx])
+        keep = d <= radius_km
+        idx, d = idx[keep], d[keep]
+        order = np.argsort(d, kind="stable")
+        return [(self.ids[i], float(x)) for i, x in zip(idx[order], d[order])]
+
+    def count_within(self, lat: float, lon: float, radius_km: float) -> int:
+        return len(self.within_radius(lat, lon, radius_km))
+
+    def nearest(self, lat: float, lon: float, n: int = 10) -> List[Tuple[str, float]]:
+        """
+        [(listing_id, distance_km)] for the n closest listings, searching
+        rings of cells outward until no unvisited cell can hold a closer one.
+        """
+        if not self.ids or n <= 0:
+            return []
+        ci, cj = self._cell(lat, lon)
+        keys = self.cells.keys()
+        max_ring = max(max(abs(k[0] - ci), abs(k[1] - cj)) for k in keys)
+
+        found = []
+        for ring in range(max_ring + 1):
+            for di in range(-ring, ring + 1):
+                for dj in range(-ring, ring + 1):
+                    if max(abs(di), abs(dj)) != ring or (ci + di, cj + dj) not in self.cells:
+                        continue
+                    idx = self.cells[(ci + di, cj + dj)]
+                    d = distances_km(lat, lon, self.lats[idx], self.lons[idx])
+                    found.extend((self.ids[i], float(x)) for i, x in zip(idx, d))
+            # Anything outside this ring is at least ring * cell_km away
+            if len(found) >= n:
+                found.sort(key=lambda x: x[1])
+                if found[n - 1][1] <= ring * self.cell_km:
+                    break
+        found.sort(key=lambda x: x[1])
+        return found[:n]